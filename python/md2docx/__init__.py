@@ -2,7 +2,13 @@
 md2docx - Markdown to DOCX converter with LaTeX support.
 """
 
-from .converter import Md2DocxConverter
-
 __version__ = "1.0.0"
 __all__ = ["Md2DocxConverter"]
+
+
+def __getattr__(name):
+    # Import the converter (python-docx, LaTeX backends) on first use only
+    if name == "Md2DocxConverter":
+        from .converter import Md2DocxConverter
+        return Md2DocxConverter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
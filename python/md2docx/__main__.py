@@ -4,12 +4,26 @@ CLI entry point for md2docx.
 Usage:
     python -m md2docx input.md output.docx
     python -m md2docx input.md output.docx --settings '{"fontSize": 12}'
+    python -m md2docx input.md output.docx --jobs 4
+    python -m md2docx input.md output.docx --streaming
+    python -m md2docx input.md output.docx --no-latex
 """
 
 import argparse
 import json
+import sys
+from pathlib import Path
 
-from .converter import Md2DocxConverter
+
+def _jobs(value: str) -> int:
+    """Parse --jobs: a non-negative process count (0 = CPU count)."""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be an integer, got {value!r}")
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {jobs}")
+    return jobs
 
 
 def main():
@@ -24,6 +38,22 @@ def main():
         default="{}",
         help="JSON formatting settings"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=_jobs,
+        default=None,
+        help="Processes for formula rendering (0 = CPU count, default 1)"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Write finished blocks to disk to reduce memory on large inputs"
+    )
+    parser.add_argument(
+        "--no-latex",
+        action="store_true",
+        help="Do not render formulas, keep them as $...$ text"
+    )
     
     args = parser.parse_args()
     
@@ -32,7 +62,19 @@ def main():
     except json.JSONDecodeError:
         settings = {}
     
-    converter = Md2DocxConverter(args.input, args.output, settings)
+    if not Path(args.input).exists():
+        print(f"Error: Input file {args.input} not found.")
+        sys.exit(1)
+    
+    # Heavy dependencies are imported only once there is work to do
+    from .converter import Md2DocxConverter
+    
+    if args.jobs is not None:
+        settings["renderJobs"] = args.jobs
+    if args.no_latex:
+        settings["noLatex"] = True
+    
+    converter = Md2DocxConverter(args.input, args.output, settings, streaming=args.streaming)
     converter.convert()
 
 
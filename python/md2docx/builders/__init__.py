@@ -3,7 +3,8 @@ Document builders submodule.
 """
 
 from .base import DocumentBuilder
+from .streaming import StreamingDocumentBuilder
 from .lists import ListBuilder
 from .formulas import FormulaBuilder
 
-__all__ = ["DocumentBuilder", "ListBuilder", "FormulaBuilder"]
+__all__ = ["DocumentBuilder", "StreamingDocumentBuilder", "ListBuilder", "FormulaBuilder"]
@@ -2,14 +2,22 @@
 Main DOCX document builder.
 """
 
+from lxml import etree
 from docx import Document
 from docx.shared import Pt, Cm
-from docx.oxml.ns import qn
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsmap, nsdecls
+from docx.table import Table
 
 from .lists import ListBuilder
+from .utils import add_p
 from .formulas import FormulaBuilder
 
+# Pre-resolved qualified names and XPath used while building the document
+_QN_ASCII = qn("w:ascii")
+_QN_HANSI = qn("w:hAnsi")
+_RFONTS_XPATH = etree.XPath(".//w:rFonts", namespaces={"w": nsmap["w"]})
+
 
 class DocumentBuilder:
     """Builds DOCX document from parsed markdown."""
@@ -27,6 +35,26 @@ class DocumentBuilder:
     
     def __init__(self, settings: dict = None):
         self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        
+        # Lengths are immutable and constant for the builder's lifetime
+        self._pt0 = Pt(0)
+        self._cm0 = Cm(0)
+        self._code_pt = Pt(10)
+        self._indent = Cm(self.settings["firstLineIndent"])
+        self._font_size_pt = Pt(self.settings["fontSize"])
+        self._line_spacing = self.settings["lineSpacing"]
+        self._font_family = self.settings["fontFamily"]
+        
+        # Prefilled <w:pPr> fragments for the common paragraph flavors
+        spacing = '<w:spacing w:after="0" w:before="0"/>'
+        self._body_ppr = (
+            f'<w:spacing w:after="0" w:before="0" w:line="{round(self._line_spacing * 240)}" w:lineRule="auto"/>'
+            f'<w:ind w:firstLine="{self._indent.twips}"/>'
+            '<w:jc w:val="both"/>'
+        )
+        self._heading_ppr = spacing + '<w:ind w:firstLine="0"/><w:jc w:val="center"/>'
+        self._quote_ppr = '<w:pStyle w:val="Quote"/>' + spacing
+        
         self.doc = Document()
         self._setup_document()
         
@@ -64,38 +92,33 @@ class DocumentBuilder:
         section.right_margin = Cm(self.settings["marginRight"])
         
         style = self.doc.styles["Normal"]
-        style.font.name = self.settings["fontFamily"]
-        style.font.size = Pt(self.settings["fontSize"])
+        style.font.name = self._font_family
+        style.font.size = self._font_size_pt
         
         pf = style.paragraph_format
-        pf.line_spacing = self.settings["lineSpacing"]
-        pf.space_after = Pt(0)
-        pf.space_before = Pt(0)
-        pf.first_line_indent = Cm(self.settings["firstLineIndent"])
+        pf.line_spacing = self._line_spacing
+        pf.space_after = self._pt0
+        pf.space_before = self._pt0
+        pf.first_line_indent = self._indent
         
-        rFonts = style.element.xpath(".//w:rFonts")[0]
-        rFonts.set(qn("w:ascii"), self.settings["fontFamily"])
-        rFonts.set(qn("w:hAnsi"), self.settings["fontFamily"])
+        rFonts = _RFONTS_XPATH(style.element)[0]
+        rFonts.set(_QN_ASCII, self._font_family)
+        rFonts.set(_QN_HANSI, self._font_family)
+        
+        # Quote text is upright; runs only carry explicit bold/italic
+        try:
+            self.doc.styles["Quote"].font.italic = None
+        except KeyError:
+            pass
     
     def add_heading(self, text: str, level: int):
         """Add heading paragraph."""
-        p = self.doc.add_paragraph()
-        p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.space_before = Pt(0)
-        p.paragraph_format.first_line_indent = Cm(0)
-        return p
+        return add_p(self.doc, self._heading_ppr)
     
     def add_paragraph(self, justify: bool = True):
         """Add regular paragraph."""
-        p = self.doc.add_paragraph()
         # Use JUSTIFY alignment for proper text formatting
-        p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.space_before = Pt(0)
-        p.paragraph_format.first_line_indent = Cm(self.settings["firstLineIndent"])
-        p.paragraph_format.line_spacing = self.settings["lineSpacing"]
-        return p
+        return add_p(self.doc, self._body_ppr)
     
     def add_list_item(self, ordered: bool = False, restart: bool = False, level: int = 0):
         """Add list item paragraph."""
@@ -108,21 +131,18 @@ class DocumentBuilder:
     def add_code_block(self, code: str, language: str = ""):
         """Add code block without border."""
         p = self.doc.add_paragraph()
-        p.paragraph_format.first_line_indent = Cm(0)
-        p.paragraph_format.space_before = Pt(0)
-        p.paragraph_format.space_after = Pt(0)
+        p.paragraph_format.first_line_indent = self._cm0
+        p.paragraph_format.space_before = self._pt0
+        p.paragraph_format.space_after = self._pt0
         p.paragraph_format.line_spacing = 1.0
         
         run = p.add_run(code.strip())
         run.font.name = "Courier New"
-        run.font.size = Pt(10)
+        run.font.size = self._code_pt
     
     def add_blockquote(self):
         """Add blockquote paragraph."""
-        p = self.doc.add_paragraph(style="Quote")
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.space_before = Pt(0)
-        return p
+        return add_p(self.doc, self._quote_ppr)
     
     def add_page_break(self):
         """Add page break."""
@@ -130,15 +150,6 @@ class DocumentBuilder:
     
     def add_table(self, rows: int, cols: int):
         """Add table with proper column widths."""
-        from docx.shared import Cm
-        from docx.oxml.ns import qn
-        from docx.oxml import OxmlElement
-        from docx.enum.table import WD_TABLE_ALIGNMENT
-        
-        table = self.doc.add_table(rows=rows, cols=cols)
-        table.style = "Table Grid"
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        
         # Available width: A4 (21cm) - left margin (3cm) - right margin (1.5cm) = 16.5cm
         available_width = 16.5
         
@@ -153,73 +164,45 @@ class DocumentBuilder:
             col_width = Cm(available_width / cols)
             widths = [col_width] * cols
         
-        # Set table width and layout explicitly
-        tbl = table._tbl
-        tblPr = tbl.tblPr if tbl.tblPr is not None else OxmlElement('w:tblPr')
-        
-        # Set table width
-        tblW = OxmlElement('w:tblW')
-        tblW.set(qn('w:w'), str(int(available_width * 567)))  # Convert cm to twips
-        tblW.set(qn('w:type'), 'dxa')
-        # Remove existing tblW if any
-        for existing in tblPr.findall(qn('w:tblW')):
-            tblPr.remove(existing)
-        tblPr.append(tblW)
-        
-        # Set fixed table layout to prevent auto-resizing
-        tblLayout = OxmlElement('w:tblLayout')
-        tblLayout.set(qn('w:type'), 'fixed')
-        # Remove existing tblLayout if any
-        for existing in tblPr.findall(qn('w:tblLayout')):
-            tblPr.remove(existing)
-        tblPr.append(tblLayout)
-        
-        if tbl.tblPr is None:
-            tbl.insert(0, tblPr)
-        
-        # Set column widths via tblGrid for proper fixed layout
-        tblGrid = tbl.tblGrid
-        if tblGrid is None:
-            tblGrid = OxmlElement('w:tblGrid')
-            tbl.insert(1, tblGrid)
-        else:
-            # Clear existing gridCol elements
-            for child in list(tblGrid):
-                tblGrid.remove(child)
-        
-        for width in widths:
-            gridCol = OxmlElement('w:gridCol')
-            gridCol.set(qn('w:w'), str(int(width.cm * 567)))
-            tblGrid.append(gridCol)
-        
-        # Set column widths on cells
-        for row in table.rows:
-            for idx, cell in enumerate(row.cells):
-                if idx < len(widths):
-                    cell.width = widths[idx]
-                    # Also set cell width in XML for better compatibility
-                    tc = cell._tc
-                    tcPr = tc.get_or_add_tcPr()
-                    tcW = OxmlElement('w:tcW')
-                    tcW.set(qn('w:w'), str(int(widths[idx].cm * 567)))
-                    tcW.set(qn('w:type'), 'dxa')
-                    # Remove existing tcW if any
-                    for existing in tcPr.findall(qn('w:tcW')):
-                        tcPr.remove(existing)
-                    tcPr.append(tcW)
-        
-        # Disable autofit to keep fixed widths
-        table.autofit = False
+        # Column widths in twips (1cm = 567 twips)
+        width_twips = [str(int(width.cm * 567)) for width in widths]
+        
+        # Build the whole table (fixed layout, grid and per-cell widths) as one
+        # XML string and parse it once instead of patching cells one by one
+        grid_xml = "".join(f'<w:gridCol w:w="{twips}"/>' for twips in width_twips)
+        row_xml = "<w:tr>" + "".join(
+            f'<w:tc><w:tcPr><w:tcW w:w="{twips}" w:type="dxa"/></w:tcPr><w:p/></w:tc>'
+            for twips in width_twips
+        ) + "</w:tr>"
+        tbl = parse_xml(
+            f"<w:tbl {nsdecls('w')}>"
+            "<w:tblPr>"
+            f'<w:tblW w:w="{int(available_width * 567)}" w:type="dxa"/>'
+            '<w:jc w:val="center"/>'
+            '<w:tblLayout w:type="fixed"/>'
+            '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1"'
+            ' w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>'
+            "</w:tblPr>"
+            f"<w:tblGrid>{grid_xml}</w:tblGrid>"
+            f"{row_xml * rows}"
+            "</w:tbl>"
+        )
+        self.doc.element.body._insert_tbl(tbl)
+        
+        table = Table(tbl, self.doc._body)
+        table.style = "Table Grid"
         
         return table
     
     def add_text_run(self, paragraph, text: str, bold: bool = False, italic: bool = False):
         """Add text run to paragraph."""
+        # Font name and size are inherited from the Normal style; only emit
+        # <w:b>/<w:i> when actually needed
         run = paragraph.add_run(text)
-        run.font.name = self.settings["fontFamily"]
-        run.font.size = Pt(self.settings["fontSize"])
-        run.bold = bold
-        run.italic = italic
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
         return run
     
     def add_inline_formula(self, paragraph, formula: str, max_width: float = None):
@@ -230,6 +213,10 @@ class DocumentBuilder:
         """Add block LaTeX formula as centered paragraph."""
         return self.formulas.add_block(formula)
     
+    def prerender_formulas(self):
+        """Render all extracted LaTeX formulas before document assembly."""
+        self.formulas.prerender_all()
+    
     def process_inline_markers(self, text: str, paragraph, bold: bool = False, italic: bool = False, max_width: float = None):
         """Process text with %%LATEX_INLINE:id%% markers."""
         self.formulas.process_inline_markers(text, paragraph, self.add_text_run, bold=bold, italic=italic, max_width=max_width)
@@ -238,10 +225,20 @@ class DocumentBuilder:
         """Process text with %%LATEX_BLOCK:id%% markers."""
         self.formulas.process_block_markers(text, paragraph, self.add_text_run)
     
+    def flush(self):
+        """Hook called after each top-level block is complete.
+        
+        The in-memory builder keeps everything until save().
+        """
+    
+    def _write(self, path: str):
+        """Write the document package to path."""
+        self.doc.save(path)
+    
     def save(self, path: str):
         """Save document and cleanup."""
         try:
-            self.doc.save(path)
+            self._write(path)
         except PermissionError:
             raise PermissionError(
                 f"Не удалось сохранить файл: '{path}'\n"
@@ -3,12 +3,24 @@ LaTeX formula handling for DOCX documents.
 Uses PNG images rendered via ziamath for LibreOffice compatibility.
 """
 
+import os
+import re
+
 from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn as oxml_qn
-from docx.oxml import OxmlElement
 
-from ..latex_renderer import LaTeXRenderer
+from ..latex.patterns import INLINE_MARKER_PATTERN, iter_markers
+
+# Space before "(" or after ")" - replaced with non-breaking space (\u00A0)
+_NBSP_PATTERN = re.compile(r" (?=\()|(?<=\)) ")
+_NBSP = "\u00A0"
+
+# Zero lengths for block formula paragraphs (immutable, shared)
+_PT0 = Pt(0)
+_CM0 = Cm(0)
+
+# Environment variable with a persistent formula cache directory (if latexCacheDir is unset)
+FORMULA_CACHE_ENV = "MD2DOCX_FORMULA_CACHE"
 
 
 class FormulaBuilder:
@@ -19,21 +31,92 @@ class FormulaBuilder:
         'array', 'align', 'gather', 'split', 'eqnarray'
     ]
     
+    # Single scan for any multiline environment, explicit line break or newline
+    MULTILINE_PATTERN = re.compile(
+        r"\\begin\{(?:" + "|".join(MULTILINE_ENVS) + r")\}|\\\\|\n"
+    )
+    
     def __init__(self, doc, settings: dict):
         self.doc = doc
         self.settings = settings
-        self.latex = LaTeXRenderer()
+        self._latex = None
         self.latex_blocks: dict[int, str] = {}
         self.latex_inlines: dict[int, str] = {}
+        # Rendered PNGs keyed by (formula, is_block): (png_path, (w, h)) or None
+        self._png_cache: dict[tuple[str, bool], tuple[str, tuple[int, int]] | None] = {}
+    
+    @property
+    def latex(self):
+        """LaTeX renderer, created on first use (backend detection is slow)."""
+        if self._latex is None:
+            from ..latex.renderer import LaTeXRenderer
+            self._latex = LaTeXRenderer(
+                self.settings.get("mathRenderer"),
+                cache_dir=self.settings.get("latexCacheDir") or os.environ.get(FORMULA_CACHE_ENV),
+            )
+        return self._latex
     
     def is_multiline(self, formula: str) -> bool:
         """Check if formula contains multiline constructs."""
-        for env in self.MULTILINE_ENVS:
-            if f'\\begin{{{env}}}' in formula:
-                return True
-        if '\\\\' in formula or '\n' in formula:
-            return True
-        return False
+        # Every multiline construct needs a backslash or a newline
+        if "\\" not in formula and "\n" not in formula:
+            return False
+        return self.MULTILINE_PATTERN.search(formula) is not None
+    
+    @staticmethod
+    def _cache_key(formula: str, is_block: bool) -> tuple[str, bool]:
+        """Build PNG cache key; whitespace differences don't change rendering."""
+        return " ".join(formula.split()), is_block
+    
+    def _render(self, formula: str, is_block: bool) -> tuple[str, tuple[int, int]] | None:
+        """Render formula to PNG once and reuse the file for repeated formulas.
+        
+        Returns:
+            (png_path, (width, height)) in pixels or None if rendering failed
+        """
+        if self.settings.get("noLatex"):
+            return None
+        
+        key = self._cache_key(formula, is_block)
+        if key in self._png_cache:
+            return self._png_cache[key]
+        
+        png_path = self.latex.render_to_png(formula, is_block=is_block)
+        result = (png_path, self.latex.get_image_size(png_path)) if png_path else None
+        self._png_cache[key] = result
+        return result
+    
+    def prerender_all(self):
+        """Render every extracted formula up front in one batch.
+        
+        Fills the PNG cache so that add_inline/add_block only look up
+        already rendered images while the document is assembled.
+        """
+        if self.settings.get("noLatex"):
+            return
+        
+        # Cache key -> (formula, is_block); blocks and inlines share one batch
+        pending: dict[tuple[str, bool], tuple[str, bool]] = {}
+        for formula in self.latex_blocks.values():
+            if not formula.strip():
+                continue
+            key = self._cache_key(formula, True)
+            if key not in self._png_cache:
+                pending.setdefault(key, (formula, True))
+        for formula in self.latex_inlines.values():
+            if not formula.strip():
+                continue
+            is_multi = self.is_multiline(formula)
+            key = self._cache_key(formula, is_multi)
+            if key not in self._png_cache:
+                pending.setdefault(key, (formula, is_multi))
+        
+        if not pending:
+            return
+        paths = self.latex.render_batch(list(pending.values()), jobs=self.settings.get("renderJobs", 1))
+        for key, item in pending.items():
+            png_path = paths.get(item)
+            self._png_cache[key] = (png_path, self.latex.get_image_size(png_path)) if png_path else None
     
     def add_inline(self, paragraph, formula: str, add_text_run_func, max_width: float = None, bold: bool = False, italic: bool = False) -> bool:
         """Add inline LaTeX formula to paragraph as PNG image.
@@ -46,13 +129,16 @@ class FormulaBuilder:
             bold: Whether surrounding text is bold (for fallback)
             italic: Whether surrounding text is italic (for fallback)
         """
+        if not formula or not formula.strip():
+            return False
+        
         is_multi = self.is_multiline(formula)
-        png_path = self.latex.render_to_png(formula, is_block=is_multi)
+        rendered = self._render(formula, is_multi)
         
-        if png_path:
+        if rendered:
+            png_path, (w, h) = rendered
             run = paragraph.add_run()
             try:
-                w, h = self.latex.get_image_size(png_path)
                 dpi = 192
                 w_pt = w * 72 / dpi
                 h_pt = h * 72 / dpi
@@ -76,26 +162,29 @@ class FormulaBuilder:
         
         # Fallback to text
         run = paragraph.add_run(f"${formula}$")
-        run.font.name = self.settings["fontFamily"]
-        run.font.size = Pt(self.settings["fontSize"])
-        run.bold = bold
-        run.italic = italic
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
         return False
     
     def add_block(self, formula: str):
         """Add block LaTeX formula as centered paragraph with PNG."""
-        png_path = self.latex.render_to_png(formula, is_block=True)
+        if not formula or not formula.strip():
+            return
+        
+        rendered = self._render(formula, True)
         
         p = self.doc.add_paragraph()
         p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        p.paragraph_format.space_before = Pt(0)
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.first_line_indent = Cm(0)
+        p.paragraph_format.space_before = _PT0
+        p.paragraph_format.space_after = _PT0
+        p.paragraph_format.first_line_indent = _CM0
         
-        if png_path:
+        if rendered:
+            png_path, (w, h) = rendered
             run = p.add_run()
             try:
-                w, h = self.latex.get_image_size(png_path)
                 dpi = 192
                 w_pt = w * 72 / dpi
                 h_pt = h * 72 / dpi
@@ -107,8 +196,7 @@ class FormulaBuilder:
             except Exception:
                 pass
         
-        run = p.add_run(f"${formula}$")
-        run.font.name = self.settings["fontFamily"]
+        p.add_run(f"${formula}$")
     
     def process_inline_markers(self, text: str, paragraph, add_text_run_func=None, bold: bool = False, italic: bool = False, max_width: float = None):
         """Process text with ⟦LATEX_INLINE:id⟧ markers.
@@ -121,46 +209,50 @@ class FormulaBuilder:
             italic: Whether text should be italic
             max_width: Maximum width for formulas in points (for table cells)
         """
-        parts = self.latex.inline_marker_pattern.split(text)
-        
+        parts = INLINE_MARKER_PATTERN.split(text)
+        self._emit_inline_parts(parts, paragraph, add_text_run_func, bold=bold, italic=italic, max_width=max_width)
+    
+    def _emit_inline_parts(self, parts: list[str], paragraph, add_text_run_func=None, bold: bool = False, italic: bool = False, max_width: float = None):
+        """Emit text runs and formulas from an inline-marker split (text, id, text, ...)."""
         for i, part in enumerate(parts):
             if i % 2 == 0:
                 if part:
                     # Replace regular spaces with non-breaking spaces near brackets
                     # to prevent Word from breaking lines between bracket and formula
-                    # \u00A0 is non-breaking space
-                    part = part.replace(' (', '\u00A0(')
-                    part = part.replace(') ', ')\u00A0')
+                    part = _NBSP_PATTERN.sub(_NBSP, part)
                     
                     if add_text_run_func:
                         add_text_run_func(paragraph, part, bold=bold, italic=italic)
                     else:
                         run = paragraph.add_run(part)
-                        run.bold = bold
-                        run.italic = italic
+                        if bold:
+                            run.bold = True
+                        if italic:
+                            run.italic = True
             else:
                 formula_id = int(part)
                 formula = self.latex_inlines.get(formula_id, "")
                 self.add_inline(paragraph, formula, add_text_run_func, max_width=max_width, bold=bold, italic=italic)
     
-    def process_block_markers(self, text: str, paragraph, add_text_run_func):
-        """Process text with %%LATEX_BLOCK:id%% markers."""
-        parts = []
+    def _split_blocks(self, text: str):
+        """Yield ("text", str) and ("block", id) parts around block markers."""
         last_end = 0
-        
-        for m in self.latex.block_marker_pattern.finditer(text):
-            if m.start() > last_end:
-                parts.append(("text", text[last_end:m.start()]))
-            parts.append(("block", int(m.group(1))))
-            last_end = m.end()
+        for start, end, block_id in iter_markers(text, "block"):
+            if start > last_end:
+                yield ("text", text[last_end:start])
+            yield ("block", block_id)
+            last_end = end
         
         if last_end < len(text):
-            parts.append(("text", text[last_end:]))
-        
-        for ptype, content in parts:
+            yield ("text", text[last_end:])
+    
+    def process_block_markers(self, text: str, paragraph, add_text_run_func):
+        """Process text with %%LATEX_BLOCK:id%% markers."""
+        for ptype, content in self._split_blocks(text):
             if ptype == "text" and content.strip() and paragraph is not None:
-                if self.latex.inline_marker_pattern.search(content):
-                    self.process_inline_markers(content, paragraph, add_text_run_func)
+                inline_parts = INLINE_MARKER_PATTERN.split(content)
+                if len(inline_parts) > 1:
+                    self._emit_inline_parts(inline_parts, paragraph, add_text_run_func)
                 else:
                     add_text_run_func(paragraph, content)
             elif ptype == "block":
@@ -169,4 +261,6 @@ class FormulaBuilder:
     
     def cleanup(self):
         """Remove temporary files."""
-        self.latex.cleanup()
+        if self._latex is not None:
+            self._latex.cleanup()
+        self._png_cache.clear()
@@ -3,9 +3,8 @@ List building functionality for DOCX documents.
 """
 
 from docx.shared import Pt, Cm
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from .utils import add_p
 
 
 class ListBuilder:
@@ -15,7 +14,13 @@ class ListBuilder:
         self.doc = doc
         self.settings = settings
         self._ordered_counter = 0  # Manual counter for ordered lists
-        self._current_indent = 1.5  # Track current list indent
+        self._pt0 = Pt(0)
+        # Left indent per nesting level: 1.5cm base + 0.75cm per level
+        self._left_indent_cm = {lvl: Cm(1.5 + lvl * 0.75) for lvl in range(8)}
+        self._current_indent = self._left_indent_cm[0]  # Track current list indent
+        # Prefilled <w:pPr> fragments keyed by (style id, left indent, jc value)
+        self._ppr_cache: dict[tuple, str] = {}
+        self._bullet_style_id = doc.styles["List Bullet"].style_id
         self._setup_list_styles()
     
     def _setup_list_styles(self):
@@ -23,11 +28,25 @@ class ListBuilder:
         for style_name in ["List Number", "List Bullet"]:
             try:
                 list_style = self.doc.styles[style_name]
-                list_style.paragraph_format.space_after = Pt(0)
-                list_style.paragraph_format.space_before = Pt(0)
+                list_style.paragraph_format.space_after = self._pt0
+                list_style.paragraph_format.space_before = self._pt0
             except KeyError:
                 pass
     
+    def _ppr(self, style_id: str | None, left_indent, align: str) -> str:
+        """Prefilled <w:pPr> for a list paragraph (cached per combination)."""
+        key = (style_id, left_indent, align)
+        ppr = self._ppr_cache.get(key)
+        if ppr is None:
+            style = f'<w:pStyle w:val="{style_id}"/>' if style_id else ''
+            ppr = (
+                f'{style}<w:spacing w:after="0" w:before="0"/>'
+                f'<w:ind w:firstLine="0" w:left="{left_indent.twips}"/>'
+                f'<w:jc w:val="{align}"/>'
+            )
+            self._ppr_cache[key] = ppr
+        return ppr
+    
     def add_list_item(self, ordered: bool = False, restart: bool = False, level: int = 0):
         """Add list item paragraph.
         
@@ -36,10 +55,8 @@ class ListBuilder:
             restart: True to restart numbering from 1
             level: Nesting level (0 = top level, 1 = first nested, etc.)
         """
-        # Calculate indent based on level
-        base_indent = 1.5
-        level_indent = 0.75  # Additional indent per level
-        left_indent = base_indent + (level * level_indent)
+        # Indent based on level
+        left_indent = self._left_indent_cm.get(level) or Cm(1.5 + level * 0.75)
         self._current_indent = left_indent  # Save for continuation paragraphs
         
         if ordered:
@@ -49,25 +66,13 @@ class ListBuilder:
             else:
                 self._ordered_counter += 1
             
-            p = self.doc.add_paragraph()
-            p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            p.paragraph_format.first_line_indent = Cm(0)
-            p.paragraph_format.left_indent = Cm(left_indent)
-            p.paragraph_format.space_after = Pt(0)
-            p.paragraph_format.space_before = Pt(0)
+            p = add_p(self.doc, self._ppr(None, left_indent, "left"))
             
-            # Add number manually
-            run = p.add_run(f"{self._ordered_counter}.\t")
-            run.font.name = self.settings["fontFamily"]
-            run.font.size = Pt(self.settings["fontSize"])
+            # Add number manually (font inherited from Normal, like text runs)
+            p.add_run(f"{self._ordered_counter}.\t")
         else:
             # Use bullet style for unordered lists
-            p = self.doc.add_paragraph(style="List Bullet")
-            p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            p.paragraph_format.first_line_indent = Cm(0)
-            p.paragraph_format.left_indent = Cm(left_indent)
-            p.paragraph_format.space_after = Pt(0)
-            p.paragraph_format.space_before = Pt(0)
+            p = add_p(self.doc, self._ppr(self._bullet_style_id, left_indent, "left"))
         
         return p
     
@@ -80,11 +85,4 @@ class ListBuilder:
         Args:
             justify: True for JUSTIFY alignment (long text), False for LEFT (short/formulas)
         """
-        p = self.doc.add_paragraph()
-        alignment = WD_ALIGN_PARAGRAPH.JUSTIFY if justify else WD_ALIGN_PARAGRAPH.LEFT
-        p.paragraph_format.alignment = alignment
-        p.paragraph_format.first_line_indent = Cm(0)
-        p.paragraph_format.left_indent = Cm(self._current_indent)
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.space_before = Pt(0)
-        return p
+        return add_p(self.doc, self._ppr(None, self._current_indent, "both" if justify else "left"))
@@ -0,0 +1,104 @@
+"""
+DOCX builder that streams finished blocks to disk.
+"""
+
+import io
+import shutil
+import tempfile
+import zipfile
+
+from lxml import etree
+from docx.oxml.ns import qn
+
+from .base import DocumentBuilder
+
+_QN_SECTPR = qn("w:sectPr")
+_DOCUMENT_PART = "word/document.xml"
+
+# Elements carrying a story-unique id (wp:docPr of pictures)
+_ID_XPATH = etree.XPath("descendant-or-self::*[@id]")
+
+
+class StreamingDocumentBuilder(DocumentBuilder):
+    """Builds DOCX document while keeping only the current block in memory.
+    
+    Finished body elements are serialized to a temporary file on flush()
+    and detached from the tree, so memory no longer grows with document
+    length. save() splices the streamed XML back into word/document.xml.
+    """
+    
+    def __init__(self, settings: dict = None):
+        super().__init__(settings)
+        self._stream = tempfile.TemporaryFile()
+        # Highest id already streamed; python-docx's next_id only scans the live tree
+        self._last_id = 0
+        # Declarations lxml repeats on every serialized block; the document
+        # root declares them once in the final XML
+        self._root_ns_decls = [
+            (f' xmlns:{prefix}="{uri}"' if prefix else f' xmlns="{uri}"').encode()
+            for prefix, uri in self.doc.element.nsmap.items()
+        ]
+    
+    def flush(self):
+        """Serialize finished body elements to disk and drop them from the tree."""
+        body = self.doc.element.body
+        offset = self._last_id
+        for child in list(body):
+            if child.tag == _QN_SECTPR:
+                continue
+            self._shift_ids(child, offset)
+            self._stream.write(self._serialize(child))
+            body.remove(child)
+    
+    def _serialize(self, element) -> bytes:
+        """Serialize a body element without the root's namespace declarations."""
+        xml = etree.tostring(element, encoding="UTF-8")
+        end = xml.index(b">")
+        start_tag = xml[:end]
+        for decl in self._root_ns_decls:
+            start_tag = start_tag.replace(decl, b"", 1)
+        return start_tag + xml[end:]
+    
+    def _shift_ids(self, element, offset: int):
+        """Move positive ids (and matching picture names) past those already streamed."""
+        for el in _ID_XPATH(element):
+            value = el.get("id")
+            if value.isdigit() and value != "0":
+                new_id = int(value) + offset
+                el.set("id", str(new_id))
+                # python-docx names pictures after their id
+                if el.get("name") == f"Picture {value}":
+                    el.set("name", f"Picture {new_id}")
+                if new_id > self._last_id:
+                    self._last_id = new_id
+    
+    def _write(self, path: str):
+        """Write the package with streamed blocks placed before the body's sectPr."""
+        self.flush()
+        
+        xml = etree.tostring(self.doc.element, encoding="UTF-8", standalone=True)
+        split = xml.rfind(b"<w:sectPr")
+        if split < 0:
+            split = xml.rfind(b"</w:body>")
+        
+        package = io.BytesIO()
+        self.doc.save(package)
+        
+        with zipfile.ZipFile(package) as src, \
+                zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename != _DOCUMENT_PART:
+                    dst.writestr(item, src.read(item.filename))
+                    continue
+                with dst.open(item, "w") as out:
+                    out.write(xml[:split])
+                    self._stream.seek(0)
+                    shutil.copyfileobj(self._stream, out)
+                    out.write(xml[split:])
+    
+    def save(self, path: str):
+        """Save document and release the stream."""
+        try:
+            super().save(path)
+        finally:
+            self._stream.close()
@@ -0,0 +1,14 @@
+"""
+Shared low-level helpers for DOCX builders.
+"""
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.text.paragraph import Paragraph
+
+
+def add_p(doc, ppr_xml: str) -> Paragraph:
+    """Append a <w:p> parsed from a prefilled pPr to the body, bypassing paragraph_format."""
+    p = parse_xml(f"<w:p {nsdecls('w')}><w:pPr>{ppr_xml}</w:pPr></w:p>")
+    doc.element.body._insert_p(p)
+    return Paragraph(p, doc._body)
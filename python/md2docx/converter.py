@@ -2,11 +2,12 @@
 Main converter module.
 """
 
+import mmap
 import sys
 from pathlib import Path
 
-from .document_builder import DocumentBuilder
-from .markdown_parser import MarkdownProcessor
+from .builders import DocumentBuilder, StreamingDocumentBuilder
+from .parsers import MarkdownProcessor
 
 
 class Md2DocxConverter:
@@ -18,7 +19,7 @@ class Md2DocxConverter:
         converter.convert()
     """
     
-    def __init__(self, input_md: str, output_docx: str, settings: dict = None):
+    def __init__(self, input_md: str, output_docx: str, settings: dict = None, streaming: bool = False):
         """
         Initialize converter.
         
@@ -26,12 +27,32 @@ class Md2DocxConverter:
             input_md: Path to input markdown file
             output_docx: Path to output DOCX file
             settings: Optional formatting settings dict
+            streaming: Write finished blocks to disk to bound memory on large inputs
         """
         self.input_path = Path(input_md)
         self.output_path = Path(output_docx)
-        self.builder = DocumentBuilder(settings)
+        builder_cls = StreamingDocumentBuilder if streaming else DocumentBuilder
+        self.builder = builder_cls(settings)
         self.processor = MarkdownProcessor(self.builder)
     
+    def _read_input(self) -> str:
+        """Read input markdown, decoding straight from a memory map.
+        
+        Avoids holding an intermediate bytes copy next to the decoded text.
+        Line endings are normalized to LF, as text-mode reading does.
+        """
+        with open(self.input_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped
+                return ""
+            with mm:
+                text = str(mm, "utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+    
     def convert(self):
         """Convert markdown file to DOCX."""
         if not self.input_path.exists():
@@ -39,10 +60,11 @@ class Md2DocxConverter:
             sys.exit(1)
         
         # Read markdown
-        text = self.input_path.read_text(encoding="utf-8")
+        text = self._read_input()
         
         # Parse and process
         ast = self.processor.parse(text)
+        self.builder.prerender_formulas()
         self.processor.process(ast)
         
         # Save
@@ -3,6 +3,6 @@ DOCX document building module.
 Re-exports from builders submodule for backward compatibility.
 """
 
-from .builders import DocumentBuilder
+from .builders import DocumentBuilder, StreamingDocumentBuilder
 
-__all__ = ["DocumentBuilder"]
+__all__ = ["DocumentBuilder", "StreamingDocumentBuilder"]
@@ -2,12 +2,20 @@
 LaTeX formula rendering modules.
 """
 
-from .renderer import LaTeXRenderer
-from .backends import ZIAMATH_AVAILABLE, MATPLOTLIB_AVAILABLE, SVG_BACKEND
-
 __all__ = [
     "LaTeXRenderer",
     "ZIAMATH_AVAILABLE",
     "MATPLOTLIB_AVAILABLE",
     "SVG_BACKEND",
 ]
+
+
+def __getattr__(name):
+    # Backend detection imports ziamath/matplotlib; defer it until first use
+    if name == "LaTeXRenderer":
+        from .renderer import LaTeXRenderer
+        return LaTeXRenderer
+    if name in ("ZIAMATH_AVAILABLE", "MATPLOTLIB_AVAILABLE", "SVG_BACKEND"):
+        from . import backends
+        return getattr(backends, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
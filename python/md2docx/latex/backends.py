@@ -1,13 +1,24 @@
 """
 LaTeX rendering backend detection and initialization.
+
+Detection imports ziamath/resvg/cairosvg/matplotlib and renders a probe image,
+so it runs on first use (detect_backend) rather than at import time.
+The ZIAMATH_AVAILABLE, MATPLOTLIB_AVAILABLE and SVG_BACKEND module
+attributes are still available and trigger detection when read.
 """
 
+import getpass
 import os
 import sys
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 
-# Auto-configure Cairo DLL path on Windows
-if sys.platform == 'win32':
+
+def _configure_cairo_path():
+    """Auto-configure Cairo DLL path on Windows."""
+    if sys.platform != 'win32':
+        return
     _module_dir = Path(__file__).parent.parent.parent  # python/ folder
     _cairo_paths = [
         _module_dir.parent / 'cairo-windows-1.17.2' / 'lib' / 'x64',
@@ -20,42 +31,95 @@ if sys.platform == 'win32':
             os.environ['PATH'] = str(_cairo_path) + os.pathsep + os.environ.get('PATH', '')
             break
 
-# Backend availability flags
-ZIAMATH_AVAILABLE = False
-MATPLOTLIB_AVAILABLE = False
-SVG_BACKEND = None  # 'cairosvg' or 'svglib'
-
-# Try cairosvg first
-try:
-    import ziamath as zm
-    import cairosvg
-    _test_svg = '<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"></svg>'
-    cairosvg.svg2png(bytestring=_test_svg.encode())
-    ZIAMATH_AVAILABLE = True
-    SVG_BACKEND = 'cairosvg'
-except (ImportError, OSError):
-    pass
-
-# Try svglib as fallback
-if not ZIAMATH_AVAILABLE:
+
+def _configure_mpl_config_dir():
+    """Give matplotlib a persistent config/cache dir when it has no writable one.
+    
+    Without it matplotlib creates a throwaway temp dir and rebuilds its font
+    cache in every process (including every render worker).
+    """
+    if os.environ.get('MPLCONFIGDIR'):
+        return
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(Path.home(), '.config')
+    default_dir = os.path.join(config_home, 'matplotlib')
+    if os.access(default_dir if os.path.isdir(default_dir) else config_home, os.W_OK):
+        return
     try:
-        import ziamath as zm
-        from svglib.svglib import svg2rlg
-        from reportlab.graphics import renderPM
-        import io
-        _test_svg = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
-        _drawing = svg2rlg(io.StringIO(_test_svg))
-        ZIAMATH_AVAILABLE = True
-        SVG_BACKEND = 'svglib'
-    except (ImportError, OSError, Exception):
-        pass
+        fallback = os.path.join(tempfile.gettempdir(), f'md2docx-matplotlib-{getpass.getuser()}')
+        os.makedirs(fallback, exist_ok=True)
+    except (OSError, KeyError):
+        return
+    os.environ['MPLCONFIGDIR'] = fallback
+
 
-# Matplotlib fallback
-if not ZIAMATH_AVAILABLE:
+@lru_cache(maxsize=1)
+def detect_backend() -> tuple[bool, bool, str | None]:
+    """Detect available backends once.
+    
+    Returns:
+        (ZIAMATH_AVAILABLE, MATPLOTLIB_AVAILABLE, SVG_BACKEND) where
+        SVG_BACKEND is 'resvg', 'cairosvg', 'svglib' or None
+    """
+    _configure_cairo_path()
+    
+    ziamath_available = False
+    matplotlib_available = False
+    svg_backend = None
+    
+    # Try resvg first (Rust rasterizer, no system Cairo needed)
     try:
-        import matplotlib.pyplot as plt
-        import matplotlib
-        matplotlib.use("Agg")
-        MATPLOTLIB_AVAILABLE = True
+        import ziamath as zm
+        import resvg_py
+        ziamath_available = True
+        svg_backend = 'resvg'
     except ImportError:
         pass
+    
+    # Then cairosvg
+    if not ziamath_available:
+        try:
+            import ziamath as zm
+            import cairosvg
+            _test_svg = '<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"></svg>'
+            cairosvg.svg2png(bytestring=_test_svg.encode())
+            ziamath_available = True
+            svg_backend = 'cairosvg'
+        except (ImportError, OSError):
+            pass
+    
+    # Try svglib as fallback
+    if not ziamath_available:
+        try:
+            import ziamath as zm
+            from svglib.svglib import svg2rlg
+            from reportlab.graphics import renderPM
+            import io
+            _test_svg = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
+            _drawing = svg2rlg(io.StringIO(_test_svg))
+            ziamath_available = True
+            svg_backend = 'svglib'
+        except (ImportError, OSError, Exception):
+            pass
+    
+    # Matplotlib fallback
+    if not ziamath_available:
+        _configure_mpl_config_dir()
+        try:
+            import matplotlib.pyplot as plt
+            import matplotlib
+            matplotlib.use("Agg")
+            matplotlib_available = True
+        except ImportError:
+            pass
+    
+    return ziamath_available, matplotlib_available, svg_backend
+
+
+_FLAGS = ("ZIAMATH_AVAILABLE", "MATPLOTLIB_AVAILABLE", "SVG_BACKEND")
+
+
+def __getattr__(name):
+    # Backend availability flags, computed on first access
+    if name in _FLAGS:
+        return detect_backend()[_FLAGS.index(name)]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
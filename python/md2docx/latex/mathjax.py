@@ -0,0 +1,77 @@
+"""
+Persistent Node.js/MathJax worker for LaTeX to SVG conversion.
+"""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+WORKER_SCRIPT = Path(__file__).with_name("mathjax_worker.js")
+
+
+def is_node_available() -> bool:
+    """Check if a Node.js executable is on PATH."""
+    return shutil.which("node") is not None
+
+
+class MathJaxWorker:
+    """Converts LaTeX to SVG through one long-lived Node.js process.
+    
+    The process is started on first use and serves all formulas of the
+    document, so Node and MathJax start-up is paid once.
+    """
+    
+    def __init__(self):
+        self._proc: subprocess.Popen | None = None
+    
+    def _start(self):
+        """Start the worker process."""
+        try:
+            self._proc = subprocess.Popen(
+                ["node", str(WORKER_SCRIPT)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        except OSError as e:
+            raise RuntimeError(f"Failed to start MathJax worker: {e}")
+    
+    def to_svg(self, formula: str, display: bool = False) -> str:
+        """Convert LaTeX formula to SVG string.
+        
+        Raises:
+            RuntimeError: Worker could not be started or exited
+            ValueError: MathJax rejected the formula
+        """
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        
+        try:
+            self._proc.stdin.write(json.dumps({"tex": formula, "display": display}) + "\n")
+            self._proc.stdin.flush()
+            line = self._proc.stdout.readline()
+        except OSError as e:
+            raise RuntimeError(f"MathJax worker failed: {e}")
+        
+        if not line:
+            raise RuntimeError("MathJax worker exited (is mathjax-full installed?)")
+        
+        reply = json.loads(line)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply["svg"]
+    
+    def close(self):
+        """Stop the worker process."""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+        self._proc = None
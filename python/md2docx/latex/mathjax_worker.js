@@ -0,0 +1,35 @@
+// Persistent LaTeX -> SVG worker for md2docx.
+//
+// Reads one JSON request per line from stdin: {"tex": "...", "display": true}
+// and writes one JSON reply per line to stdout: {"svg": "..."} or {"error": "..."}.
+// Requires the mathjax-full package (npm install mathjax-full).
+
+const readline = require('readline')
+const { mathjax } = require('mathjax-full/js/mathjax.js')
+const { TeX } = require('mathjax-full/js/input/tex.js')
+const { SVG } = require('mathjax-full/js/output/svg.js')
+const { liteAdaptor } = require('mathjax-full/js/adaptors/liteAdaptor.js')
+const { RegisterHTMLHandler } = require('mathjax-full/js/handlers/html.js')
+const { AllPackages } = require('mathjax-full/js/input/tex/AllPackages.js')
+
+const adaptor = liteAdaptor()
+RegisterHTMLHandler(adaptor)
+
+const html = mathjax.document('', {
+  InputJax: new TeX({ packages: AllPackages }),
+  OutputJax: new SVG({ fontCache: 'none' })
+})
+
+const rl = readline.createInterface({ input: process.stdin })
+
+rl.on('line', (line) => {
+  let reply
+  try {
+    const { tex, display } = JSON.parse(line)
+    const node = html.convert(tex, { display: Boolean(display) })
+    reply = { svg: adaptor.innerHTML(node) }
+  } catch (err) {
+    reply = { error: String((err && err.message) || err) }
+  }
+  process.stdout.write(JSON.stringify(reply) + '\n')
+})
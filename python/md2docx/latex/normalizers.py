@@ -3,8 +3,86 @@ LaTeX formula normalization for different backends.
 """
 
 import re
+from functools import lru_cache
 
+# Multiple primes (derivatives) after a symbol, most primes first
+_PRIME_PATTERN = re.compile(r"(\w)(''''|'''|''|'(?!'))")
+_PRIME_SUPERSCRIPTS = {
+    "''''": "^{(4)}",  # 4th derivative
+    "'''": "^{(3)}",   # 3rd derivative
+    "''": r"^{\prime\prime}",  # 2nd derivative
+    "'": r"^{\prime}",  # 1st derivative (not followed by another ')
+}
 
+# \begin{env}...\end{env}^something
+_MATRIX_SUP_PATTERNS = [
+    re.compile(rf'(\\begin\{{{env}\}}.*?\\end\{{{env}\}})(\^)', re.DOTALL)
+    for env in ['pmatrix', 'bmatrix', 'vmatrix', 'Bmatrix', 'matrix']
+]
+
+# \left/\right delimiters
+# ziamath: one pass drops \left/\right, keeping a plain delimiter and
+# removing an escaped one that follows (\left\{ and \right\} go entirely)
+_ZIAMATH_LEFT_RIGHT = re.compile(r'\\(?:left\s*([(\[{|])|right\s*([)\]}|])|(?:left|right)\s*\\.)')
+_MATHTEXT_LEFT = re.compile(r'\\left\s*([(\[{|.])')
+_MATHTEXT_RIGHT = re.compile(r'\\right\s*([)\]}|.])')
+_LEFT_DOT = re.compile(r'\\left\s*\\.')  # \left.
+_RIGHT_DOT = re.compile(r'\\right\s*\\.')  # \right.
+
+# Mathtext doesn't support many LaTeX commands - map them.
+# Name -> (pattern, replacement); alternatives are tried in this order.
+_MATHTEXT_TABLE = {
+    # Comparison operators
+    "le": (r'\\le(?![a-zA-Z])', r'\leq'),
+    "ge": (r'\\ge(?![a-zA-Z])', r'\geq'),
+    "ne": (r'\\ne(?![a-zA-Z])', r'\neq'),
+    # Dots
+    "ldots": (r'\\ldots', '...'),
+    "cdots": (r'\\cdots', '...'),
+    "dots": (r'\\dots', '...'),
+    # Arrows
+    "Rightarrow": (r'\\Rightarrow', r'\Longrightarrow'),
+    "to": (r'\\to(?![a-zA-Z])', r'\rightarrow'),
+    # Greek letters
+    "varepsilon": (r'\\varepsilon', r'\epsilon'),
+    # Spacing
+    "quad": (r'\\quad', r'\ \ '),
+    "qquad": (r'\\qquad', r'\ \ \ \ '),
+    # Other
+    "cdot": (r'\\cdot', r'\times'),
+}
+_MATHTEXT_REPL = {name: repl for name, (_, repl) in _MATHTEXT_TABLE.items()}
+
+# Whole table plus \text{} in a single alternation (one scan per formula)
+_MATHTEXT_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, (pattern, _) in _MATHTEXT_TABLE.items())
+    + r"|(?P<text>\\text\{(?P<text_body>[^}]*)\})"
+)
+
+
+def _replace_prime(m: re.Match) -> str:
+    """Replace primes after a symbol with the matching superscript."""
+    return m.group(1) + _PRIME_SUPERSCRIPTS[m.group(2)]
+
+
+def _replace_left_right(m: re.Match) -> str:
+    """Keep the delimiter after \\left/\\right, or drop both for an escaped one."""
+    return m.group(1) or m.group(2) or ""
+
+
+def _replace_mathtext(m: re.Match) -> str:
+    """Map a matched command; convert \\text{} to \\mathrm{} with escaped spaces."""
+    name = m.lastgroup
+    if name != "text":
+        return _MATHTEXT_REPL[name]
+    
+    # Commands inside \text{} are mapped as well
+    text = _MATHTEXT_PATTERN.sub(_replace_mathtext, m.group("text_body"))
+    normalized = "".join("\\ " if c.isspace() else c for c in text)
+    return f"\\mathrm{{{normalized}}}"
+
+
+@lru_cache(maxsize=4096)
 def normalize_for_ziamath(formula: str) -> str:
     """Normalize LaTeX for ziamath rendering.
     
@@ -13,69 +91,39 @@ def normalize_for_ziamath(formula: str) -> str:
     """
     # Handle multiple primes (derivatives) - f'''(x) -> f^{(3)}(x)
     # Must do this BEFORE other processing
-    formula = re.sub(r"(\w)''''", r"\1^{(4)}", formula)  # 4th derivative
-    formula = re.sub(r"(\w)'''", r"\1^{(3)}", formula)   # 3rd derivative  
-    formula = re.sub(r"(\w)''", r"\1^{\\prime\\prime}", formula)  # 2nd derivative
-    formula = re.sub(r"(\w)'(?!')", r"\1^{\\prime}", formula)  # 1st derivative (not followed by another ')
+    if "'" in formula:
+        formula = _PRIME_PATTERN.sub(_replace_prime, formula)
     
     # Fix ^T after matrix environments - wrap matrix in braces
     # \end{pmatrix}^T -> \end{pmatrix}}^T (with opening brace before \begin)
-    for env in ['pmatrix', 'bmatrix', 'vmatrix', 'Bmatrix', 'matrix']:
-        # Pattern: \begin{env}...\end{env}^something
-        pattern = rf'(\\begin\{{{env}\}}.*?\\end\{{{env}\}})(\^)'
-        formula = re.sub(pattern, r'{\1}\2', formula, flags=re.DOTALL)
+    if "\\end{" in formula:
+        for pattern in _MATRIX_SUP_PATTERNS:
+            formula = pattern.sub(r'{\1}\2', formula)
     
     # Remove \left and \right - they can cause height issues in ziamath
-    formula = re.sub(r'\\left\s*([(\[{|])', r'\1', formula)
-    formula = re.sub(r'\\right\s*([)\]}|])', r'\1', formula)
-    formula = re.sub(r'\\left\s*\\.', '', formula)  # \left.
-    formula = re.sub(r'\\right\s*\\.', '', formula)  # \right.
+    if "\\left" in formula or "\\right" in formula:
+        formula = _ZIAMATH_LEFT_RIGHT.sub(_replace_left_right, formula)
     
     return formula
 
 
+@lru_cache(maxsize=4096)
 def normalize_for_mathtext(formula: str, use_tex: bool = False) -> str:
     """Normalize LaTeX for matplotlib mathtext."""
     if use_tex:
         return formula
     
     # Remove \left and \right FIRST - mathtext doesn't support them
-    formula = re.sub(r'\\left\s*([(\[{|.])', r'\1', formula)
-    formula = re.sub(r'\\right\s*([)\]}|.])', r'\1', formula)
-    formula = re.sub(r'\\left\s*\\.', '', formula)
-    formula = re.sub(r'\\right\s*\\.', '', formula)
-    
-    # Mathtext doesn't support many LaTeX commands - map them
-    replacements = [
-        # Comparison operators
-        (r'\\le(?![a-zA-Z])', r'\\leq'),
-        (r'\\ge(?![a-zA-Z])', r'\\geq'),
-        (r'\\ne(?![a-zA-Z])', r'\\neq'),
-        # Dots
-        (r'\\ldots', '...'),
-        (r'\\cdots', '...'),
-        (r'\\dots', '...'),
-        # Arrows
-        (r'\\Rightarrow', r'\\Longrightarrow'),
-        (r'\\to(?![a-zA-Z])', r'\\rightarrow'),
-        # Greek letters
-        (r'\\varepsilon', r'\\epsilon'),
-        # Spacing
-        (r'\\quad', r'\\ \\ '),
-        (r'\\qquad', r'\\ \\ \\ \\ '),
-        # Other
-        (r'\\cdot', r'\\times'),
-    ]
-    
-    for pattern, repl in replacements:
-        formula = re.sub(pattern, repl, formula)
-    
-    # Handle \text{} - convert to \mathrm{}
-    def replace_text(m):
-        text = m.group(1)
-        normalized = "".join("\\ " if c.isspace() else c for c in text)
-        return f"\\mathrm{{{normalized}}}"
+    if "\\left" in formula:
+        formula = _MATHTEXT_LEFT.sub(r'\1', formula)
+    if "\\right" in formula:
+        formula = _MATHTEXT_RIGHT.sub(r'\1', formula)
+    if "\\left" in formula:
+        formula = _LEFT_DOT.sub('', formula)
+    if "\\right" in formula:
+        formula = _RIGHT_DOT.sub('', formula)
     
-    formula = re.sub(r"\\text\{([^}]*)\}", replace_text, formula)
+    # Map unsupported commands and handle \text{} in one pass
+    formula = _MATHTEXT_PATTERN.sub(_replace_mathtext, formula)
     
     return formula
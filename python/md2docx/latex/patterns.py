@@ -19,35 +19,227 @@ BLOCK_PATTERN = re.compile(
 INLINE_PATTERN = re.compile(r"(?<!\$)\$(?!\$)([^$\n]+?)\$(?!\$)")
 
 # Markers for extracted formulas - use Unicode brackets to avoid breaking markdown parsing
+# Every marker starts with this; text without it has no markers
+MARKER_PREFIX = "⟦LATEX_"
 BLOCK_MARKER_PATTERN = re.compile(r"⟦LATEX_BLOCK:(\d+)⟧")
 INLINE_MARKER_PATTERN = re.compile(r"⟦LATEX_INLINE:(\d+)⟧")
 
+# Literal marker parts for str.find/in checks (no regex needed)
+BLOCK_MARKER_PREFIX = "⟦LATEX_BLOCK:"
+INLINE_MARKER_PREFIX = "⟦LATEX_INLINE:"
+MARKER_CLOSE = "⟧"
+
+
+def _find_marker(text: str, prefix: str, start: int = 0) -> tuple[int, int, int] | None:
+    """Find the next marker with the given prefix: (start, end, id)."""
+    j = text.find(prefix, start)
+    while j != -1:
+        digits_start = j + len(prefix)
+        end = text.find(MARKER_CLOSE, digits_start)
+        if end == -1:
+            return None
+        digits = text[digits_start:end]
+        if digits.isdecimal():
+            return j, end + 1, int(digits)
+        j = text.find(prefix, j + 1)
+    return None
+
+
+def is_block_marker(text: str) -> bool:
+    """True if text is exactly one block marker (BLOCK_MARKER_PATTERN.fullmatch)."""
+    return (
+        text.startswith(BLOCK_MARKER_PREFIX)
+        and text.endswith(MARKER_CLOSE)
+        and text[len(BLOCK_MARKER_PREFIX):-1].isdecimal()
+    )
+
+
+def iter_markers(text: str, kind: str):
+    """Yield (start, end, id) for every "block" or "inline" marker in text."""
+    prefix = BLOCK_MARKER_PREFIX if kind == "block" else INLINE_MARKER_PREFIX
+    found = _find_marker(text, prefix)
+    while found is not None:
+        yield found
+        found = _find_marker(text, prefix, found[1])
+
+
+# Line break sequence kept intact when collapsing block whitespace
+_LB = '\\\\\\\\'
+
+
+def _clean_block(formula: str) -> str:
+    """Collapse whitespace in a block formula, keeping \\\\ line breaks."""
+    # str.split/join is a C-level pass and beats re.sub(r"\s+", " ") here
+    if _LB not in formula:
+        return ' '.join(formula.split())
+    formula = formula.replace(_LB, '\\x00LB\\x00')
+    formula = ' '.join(formula.split())
+    return formula.replace('\\x00LB\\x00', ' \\\\\\\\ ')
+
 
 def extract_blocks(text: str) -> tuple[str, dict[int, str]]:
     """Extract block formulas and replace with markers."""
     blocks = {}
-
-    def replace(m):
-        idx = len(blocks)
+    parts = []
+    last = 0
+    
+    for m in BLOCK_PATTERN.finditer(text):
         formula = m.group(1) or m.group(2) or m.group(3)
-        if formula:
-            formula = formula.replace('\\\\\\\\', '\\x00LB\\x00')
-            formula = ' '.join(formula.split())
-            formula = formula.replace('\\x00LB\\x00', ' \\\\\\\\ ')
-            blocks[idx] = formula
-            return f"\n\n⟦LATEX_BLOCK:{idx}⟧\n\n"
-        return m.group(0)
-
-    return BLOCK_PATTERN.sub(replace, text), blocks
+        if not formula:
+            continue  # Left in place
+        idx = len(blocks)
+        blocks[idx] = _clean_block(formula)
+        parts.append(text[last:m.start()])
+        parts.append(f"\n\n⟦LATEX_BLOCK:{idx}⟧\n\n")
+        last = m.end()
+    
+    parts.append(text[last:])
+    return ''.join(parts), blocks
 
 
 def extract_inlines(text: str) -> tuple[str, dict[int, str]]:
     """Extract $...$ inline formulas and replace with markers."""
     inlines = {}
+    parts = []
+    last = 0
     
-    def replace(m):
+    for m in INLINE_PATTERN.finditer(text):
+        idx = len(inlines)
+        inlines[idx] = m.group(1)
+        parts.append(text[last:m.start()])
+        parts.append(f"⟦LATEX_INLINE:{idx}⟧")
+        last = m.end()
+    
+    parts.append(text[last:])
+    return ''.join(parts), inlines
+
+
+_WS = " \t"
+
+# Where a block formula can start: $ first on its line, or $$ anywhere
+_BLOCK_START = re.compile(r"(?P<line>^[ \t]*\$)|\$(?=\$)", re.MULTILINE)
+
+
+def _skip_ws(text: str, i: int) -> int:
+    """Index of the first char at or after i that is not a space or tab."""
+    n = len(text)
+    while i < n and text[i] in _WS:
+        i += 1
+    return i
+
+
+def _closes_line(text: str, i: int) -> int:
+    """End of trailing spaces from i if they run to a newline or end, else -1."""
+    i = _skip_ws(text, i)
+    return i if i == len(text) or text[i] == "\n" else -1
+
+
+def _match_dollar_block(text: str, j: int) -> tuple[int, str] | None:
+    """$$...$$ starting at j: (end, formula)."""
+    if not text.startswith("$$", j):
+        return None
+    e = text.find("$", j + 2)
+    if e <= j + 2 or not text.startswith("$$", e):
+        return None
+    return e + 2, text[j + 2:e]
+
+
+def _match_line_block(text: str, j: int) -> tuple[int, str] | None:
+    """Standalone $ line, formula lines, $ line; j is the opening $."""
+    k = _skip_ws(text, j + 1)
+    if k >= len(text) or text[k] != "\n":
+        return None
+    e = text.find("$", k + 1)
+    if e == -1:
+        return None
+    n = text.rfind("\n", k + 1, e)
+    if n == -1 or text[n + 1:e].strip(_WS):
+        return None
+    end = _closes_line(text, e + 1)
+    if end == -1:
+        return None
+    return end, text[k + 1:n]
+
+
+def _match_env_block(text: str, j: int) -> tuple[int, str] | None:
+    """$\\begin{env}...\\end{env}$ on its own lines; j is the opening $."""
+    b = _skip_ws(text, j + 1)
+    if not text.startswith("\\begin{", b):
+        return None
+    c = text.find("}", b + 7)
+    if c <= b + 7:
+        return None
+    # Body up to \end{...} can't contain $, the \end{...} name can
+    limit = text.find("$", c + 1)
+    if limit == -1:
+        limit = len(text)
+    t = text.find("\\end{", c + 1, limit + 5)
+    d = -1  # Closing } of the current \end{...}; shared by candidates before it
+    while t != -1 and t <= limit:
+        if d < t + 5:
+            d = text.find("}", t + 5)
+            if d == -1:
+                return None
+        if d > t + 5:
+            e = _skip_ws(text, d + 1)
+            if text.startswith("$", e):
+                end = _closes_line(text, e + 1)
+                if end != -1:
+                    return end, text[b:d + 1]
+        t = text.find("\\end{", t + 1, limit + 5)
+    return None
+
+
+def extract_all(text: str) -> tuple[str, dict[int, str], dict[int, str]]:
+    """Extract block and inline formulas in a single left-to-right scan.
+    
+    Gives the same result as extract_blocks followed by extract_inlines.
+    Blocks are only tried where one can start ($$ or $ at line start) and
+    checked with str.find instead of the backtracking BLOCK_PATTERN; inline
+    formulas are replaced in the text between blocks as it is emitted.
+    
+    Returns:
+        (text with markers, block formulas, inline formulas)
+    """
+    blocks: dict[int, str] = {}
+    inlines: dict[int, str] = {}
+    out: list[str] = []
+    
+    def replace_inline(m):
         idx = len(inlines)
         inlines[idx] = m.group(1)
         return f"⟦LATEX_INLINE:{idx}⟧"
     
-    return INLINE_PATTERN.sub(replace, text), inlines
+    gap_start = 0  # Start of text not yet written to out
+    m = _BLOCK_START.search(text)
+    while m is not None:
+        start = m.start()
+        j = m.end() - 1  # The $ that opens the candidate block
+        match = None
+        if m.lastgroup == "line":
+            # At a line start: $$ first, then standalone $ blocks
+            if start == j:
+                match = _match_dollar_block(text, j)
+            if match is None:
+                match = _match_line_block(text, j) or _match_env_block(text, j)
+            if match is None and start != j:
+                start = j
+                match = _match_dollar_block(text, j)
+        else:
+            match = _match_dollar_block(text, j)
+        
+        if match is None:
+            m = _BLOCK_START.search(text, j + 1)
+            continue
+        
+        end, formula = match
+        if formula:
+            out.append(INLINE_PATTERN.sub(replace_inline, text[gap_start:start]))
+            idx = len(blocks)
+            blocks[idx] = _clean_block(formula)
+            out.append(f"\n\n⟦LATEX_BLOCK:{idx}⟧\n\n")
+            gap_start = end
+        m = _BLOCK_START.search(text, end)
+    
+    out.append(INLINE_PATTERN.sub(replace_inline, text[gap_start:]))
+    return "".join(out), blocks, inlines
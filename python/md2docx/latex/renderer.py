@@ -2,27 +2,72 @@
 Main LaTeX renderer class.
 """
 
+import hashlib
+import itertools
+import multiprocessing
 import os
+import shutil
 import tempfile
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 
-from .backends import ZIAMATH_AVAILABLE, MATPLOTLIB_AVAILABLE, SVG_BACKEND
+from .backends import detect_backend
+from .mathjax import MathJaxWorker, is_node_available
 from .normalizers import normalize_for_ziamath, normalize_for_mathtext
 from .patterns import (
     BLOCK_PATTERN, INLINE_PATTERN,
     BLOCK_MARKER_PATTERN, INLINE_MARKER_PATTERN,
-    extract_blocks, extract_inlines
+    extract_blocks, extract_inlines, extract_all
 )
-from .utils import get_image_size, cleanup_temp_files, svg_to_png_svglib
+from .utils import get_image_size, cleanup_temp_files, get_svg_converter
+
+# Smallest batch rendered in worker processes instead of serially
+_MIN_POOL_FORMULAS = 4
+
+# Environment variable overriding where temporary PNGs are written
+TMPDIR_ENV = "MD2DOCX_TMPDIR"
+_SHM_DIR = "/dev/shm"
+
+
+def _temp_root() -> str | None:
+    """Where to put the temp directory: MD2DOCX_TMPDIR, then tmpfs, then the default."""
+    root = os.environ.get(TMPDIR_ENV)
+    if root:
+        return root
+    # PNGs are read back right after they are written: keep them in RAM
+    if os.path.isdir(_SHM_DIR) and os.access(_SHM_DIR, os.W_OK):
+        return _SHM_DIR
+    return None
 
 
 class LaTeXRenderer:
     """Renders LaTeX formulas to PNG images."""
     
-    def __init__(self):
-        self.temp_files: list[str] = []
+    def __init__(self, engine: str | None = None, cache_dir: str | None = None,
+                 temp_dir: str | None = None):
+        """
+        Args:
+            engine: Preferred math renderer: "mathjax" for the Node.js
+                worker, None/"ziamath" for the default backend chain
+            cache_dir: Optional directory to keep rendered PNGs between runs
+                (e.g. a tmpfs like /dev/shm for many runs on one machine)
+            temp_dir: Directory for temporary PNGs owned by someone else
+                (pool workers write into the parent renderer's directory)
+        """
+        self.engine = engine
+        self.cache_dir = cache_dir
+        # All temporary PNGs live in one directory, removed as a whole by cleanup
+        self._temp_dir = temp_dir
+        self._owns_temp_dir = temp_dir is None
+        self._temp_names = itertools.count()
+        # Rendered PNG path by content hash of (backend, is_block, formula)
+        self._png_cache: dict[str, str] = {}
+        self.use_mathjax = False
         self.use_ziamath = False
         self.use_tex = False
+        self._mathjax: MathJaxWorker | None = None
+        self._mpl_fig = None  # Figure reused by every matplotlib render
+        self.ziamath_available, self.matplotlib_available, self.svg_backend = detect_backend()
         self.enabled = self._check_support()
         
         # Expose patterns as instance attributes for compatibility
@@ -33,11 +78,18 @@ class LaTeXRenderer:
     
     def _check_support(self) -> bool:
         """Check available rendering backends."""
-        if ZIAMATH_AVAILABLE:
+        if self.engine == "mathjax":
+            if is_node_available() and self.svg_backend:
+                self.use_mathjax = True
+                self._mathjax = MathJaxWorker()
+                return True
+            warnings.warn("MathJax renderer needs Node.js and an SVG backend, using default renderer")
+        
+        if self.ziamath_available:
             self.use_ziamath = True
             return True
         
-        if not MATPLOTLIB_AVAILABLE:
+        if not self.matplotlib_available:
             return False
         
         import matplotlib
@@ -74,9 +126,75 @@ class LaTeXRenderer:
         plt.close(fig)
         os.unlink(temp.name)
     
+    @property
+    def temp_dir(self) -> str:
+        """Directory for temporary PNGs, created on first use."""
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="md2docx_", dir=_temp_root())
+        return self._temp_dir
+    
+    def _new_temp_png(self) -> str:
+        """Path for a new temporary PNG (pid keeps pool workers' names apart)."""
+        return os.path.join(self.temp_dir, f"latex_{os.getpid()}_{next(self._temp_names)}.png")
+    
+    @property
+    def backend(self) -> str:
+        """Name of the backend formulas are rendered with."""
+        if self.use_mathjax:
+            return "mathjax"
+        if self.use_ziamath:
+            return "ziamath"
+        return "tex" if self.use_tex else "mathtext"
+    
+    def _cache_key(self, formula: str, is_block: bool) -> str:
+        """Content hash identifying a rendered formula.
+        
+        Hashes the formula as the active backend sees it, so spellings that
+        normalize the same (f'' and f^{\\prime\\prime}) share one PNG.
+        """
+        formula = " ".join(formula.split())
+        if self.use_ziamath and not self.use_mathjax:
+            formula = normalize_for_ziamath(formula)
+        elif not self.use_mathjax:
+            formula = normalize_for_mathtext(formula, self.use_tex)
+        data = f"{self.backend}|{is_block}|{formula}".encode()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    def _cached(self, key: str) -> str | None:
+        """Get an already rendered PNG from memory or the persistent cache."""
+        path = self._png_cache.get(key)
+        if path is not None:
+            return path  # Rendered by this renderer; files live until cleanup
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.png")
+            if os.path.exists(path):
+                self._png_cache[key] = path
+                return path
+        return None
+    
+    def _store(self, key: str, path: str) -> str:
+        """Remember a freshly rendered PNG; move it into the persistent cache if enabled.
+        
+        Returns:
+            Path the PNG can be read from from now on
+        """
+        if self.cache_dir:
+            cached = os.path.join(self.cache_dir, f"{key}.png")
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # A rename when the temp and cache dirs share a filesystem
+                shutil.move(path, cached)
+                path = cached
+            except OSError as e:
+                warnings.warn(f"Failed to write LaTeX cache: {e}")
+        self._png_cache[key] = path
+        return path
+    
     def render_to_png(self, formula: str, is_block: bool = False) -> str | None:
         """Render LaTeX formula to PNG file.
         
+        Repeated formulas reuse the PNG rendered first.
+        
         Args:
             formula: LaTeX formula (without $ delimiters)
             is_block: True for block formulas (larger size)
@@ -87,13 +205,25 @@ class LaTeXRenderer:
         if not self.enabled:
             return None
         
-        # Try ziamath first, fall back to matplotlib on error
-        if self.use_ziamath:
+        key = self._cache_key(formula, is_block)
+        path = self._cached(key)
+        if path is None:
+            path = self._render_uncached(formula, is_block)
+            if path:
+                path = self._store(key, path)
+        return path
+    
+    def _render_uncached(self, formula: str, is_block: bool) -> str | None:
+        """Render formula with the active backend chain."""
+        # Try SVG backends first, fall back to matplotlib on error
+        if self.use_mathjax or self.use_ziamath:
             try:
+                if self.use_mathjax:
+                    return self._render_mathjax(formula, is_block)
                 return self._render_ziamath(formula)
             except Exception as e:
                 # Try matplotlib as fallback for complex formulas
-                if MATPLOTLIB_AVAILABLE:
+                if self.matplotlib_available:
                     try:
                         return self._render_matplotlib(formula, is_block)
                     except Exception:
@@ -107,6 +237,68 @@ class LaTeXRenderer:
                 warnings.warn(f"Failed to render: {formula[:50]}... Error: {e}")
                 return None
     
+    def render_many(self, formulas: list[str], is_block: bool = False, jobs: int = 1) -> dict[str, str | None]:
+        """Render a batch of same-size formulas in one pass.
+        
+        Args:
+            formulas: LaTeX formulas (without $ delimiters)
+            is_block: True for block formulas (larger size)
+            jobs: Number of worker processes (1 = serial, 0 = CPU count)
+            
+        Returns:
+            Mapping of formula to PNG path (None on failure)
+        """
+        paths = self.render_batch([(formula, is_block) for formula in formulas], jobs=jobs)
+        return {formula: path for (formula, _), path in paths.items()}
+    
+    def render_batch(self, items: list[tuple[str, bool]], jobs: int = 1) -> dict[tuple[str, bool], str | None]:
+        """Render block and inline formulas together, sharing one worker pool.
+        
+        Args:
+            items: (formula, is_block) pairs
+            jobs: Number of worker processes (1 = serial, 0 = CPU count)
+            
+        Returns:
+            Mapping of (formula, is_block) to PNG path (None on failure)
+        """
+        unique = list(dict.fromkeys(items))
+        if not self.enabled:
+            return dict.fromkeys(unique)
+        
+        result: dict[tuple[str, bool], str | None] = {}
+        pending: list[tuple[str, bool]] = []
+        for item in unique:
+            path = self._cached(self._cache_key(*item))
+            if path is None:
+                pending.append(item)
+            else:
+                result[item] = path
+        
+        # 0 (or an invalid count from the settings) means one worker per CPU
+        workers = jobs if jobs and jobs > 0 else os.cpu_count() or 1
+        
+        # A pool only pays off once there are several formulas to share out
+        if workers == 1 or len(pending) < _MIN_POOL_FORMULAS:
+            for formula, is_block in pending:
+                result[formula, is_block] = self.render_to_png(formula, is_block=is_block)
+        else:
+            # matplotlib and cairo are not fork-safe everywhere: always spawn workers
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                paths = list(executor.map(
+                    _render_worker,
+                    [(formula, is_block, self.engine, self.temp_dir) for formula, is_block in pending],
+                    chunksize=8,
+                ))
+            for item, path in zip(pending, paths):
+                if path:
+                    # Workers write into this renderer's temp_dir, removed by cleanup
+                    path = self._store(self._cache_key(*item), path)
+                result[item] = path
+        
+        return {item: result[item] for item in unique}
+    
     def _render_ziamath(self, formula: str) -> str:
         """Render using ziamath."""
         import ziamath as zm
@@ -114,19 +306,28 @@ class LaTeXRenderer:
         formula = normalize_for_ziamath(formula)
         
         latex = zm.Latex(formula)
-        svg = latex.svg()
-        
-        temp = tempfile.NamedTemporaryFile(suffix=".png", prefix="latex_", delete=False)
-        temp.close()
-        
-        if SVG_BACKEND == 'cairosvg':
-            import cairosvg
-            cairosvg.svg2png(bytestring=svg.encode(), write_to=temp.name, scale=2.0)
-        else:
-            svg_to_png_svglib(svg, temp.name, scale=2.0)
-        
-        self.temp_files.append(temp.name)
-        return temp.name
+        return self._svg_to_png(latex.svg())
+    
+    def _render_mathjax(self, formula: str, is_block: bool) -> str:
+        """Render using the persistent MathJax worker."""
+        try:
+            svg = self._mathjax.to_svg(formula, display=is_block)
+        except RuntimeError as e:
+            # Worker can't run (e.g. mathjax-full missing) - stop trying it
+            warnings.warn(f"MathJax renderer not available, using default renderer: {e}")
+            self.use_mathjax = False
+            self.use_ziamath = self.ziamath_available
+            # Render this formula with the new backend too, not only the next ones
+            if self.use_ziamath:
+                return self._render_ziamath(formula)
+            raise
+        return self._svg_to_png(svg)
+    
+    def _svg_to_png(self, svg: str) -> str:
+        """Rasterize SVG to a temporary PNG file."""
+        path = self._new_temp_png()
+        get_svg_converter(self.svg_backend)(svg, path, 2.0)
+        return path
     
     def _render_matplotlib(self, formula: str, is_block: bool) -> str:
         """Render using matplotlib."""
@@ -140,18 +341,19 @@ class LaTeXRenderer:
         else:
             width, height, fontsize = max(2, min(6, length/10)), 0.5, 14
         
-        fig = plt.figure(figsize=(width, height), dpi=300)
+        # Creating a figure costs more than drawing one formula: reuse it
+        fig = self._mpl_fig
+        if fig is None:
+            fig = self._mpl_fig = plt.figure(figsize=(width, height), dpi=300)
+        else:
+            fig.clf()
+            fig.set_size_inches(width, height)
         fig.text(0.5, 0.5, f"${formula}$", fontsize=fontsize, 
                  usetex=self.use_tex, va="center", ha="center")
         
-        temp = tempfile.NamedTemporaryFile(suffix=".png", prefix="latex_", delete=False)
-        temp.close()
-        
-        fig.savefig(temp.name, dpi=300, transparent=True, bbox_inches="tight", pad_inches=0.02)
-        plt.close(fig)
-        
-        self.temp_files.append(temp.name)
-        return temp.name
+        path = self._new_temp_png()
+        fig.savefig(path, dpi=300, transparent=True, bbox_inches="tight", pad_inches=0.02)
+        return path
     
     def extract_blocks(self, text: str) -> tuple[str, dict[int, str]]:
         """Extract block formulas and replace with markers."""
@@ -161,12 +363,36 @@ class LaTeXRenderer:
         """Extract inline formulas and replace with markers."""
         return extract_inlines(text)
     
+    def extract_all(self, text: str) -> tuple[str, dict[int, str], dict[int, str]]:
+        """Extract block and inline formulas in one pass."""
+        return extract_all(text)
+    
     def cleanup(self):
         """Remove temporary PNG files."""
-        cleanup_temp_files(self.temp_files)
-        self.temp_files.clear()
+        if self._temp_dir is not None and self._owns_temp_dir:
+            cleanup_temp_files(self._temp_dir)
+            self._temp_dir = None
+        self._png_cache.clear()
+        if self._mathjax is not None:
+            self._mathjax.close()
+        if self._mpl_fig is not None:
+            import matplotlib.pyplot as plt
+            plt.close(self._mpl_fig)
+            self._mpl_fig = None
     
     @staticmethod
     def get_image_size(png_path: str) -> tuple[int, int]:
         """Get PNG dimensions in pixels."""
         return get_image_size(png_path)
+
+
+_worker_renderer: LaTeXRenderer | None = None
+
+
+def _render_worker(args: tuple[str, bool, str | None, str]) -> str | None:
+    """Render one formula in a pool worker (one renderer per process)."""
+    global _worker_renderer
+    formula, is_block, engine, temp_dir = args
+    if _worker_renderer is None:
+        _worker_renderer = LaTeXRenderer(engine, temp_dir=temp_dir)
+    return _worker_renderer.render_to_png(formula, is_block=is_block)
@@ -2,43 +2,50 @@
 Utility functions for LaTeX rendering.
 """
 
-import os
-import warnings
+import shutil
+import struct
+from functools import lru_cache
 
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@lru_cache(maxsize=4096)
 def get_image_size(png_path: str) -> tuple[int, int]:
-    """Get PNG dimensions in pixels."""
+    """Get PNG dimensions in pixels (cached by path).
+    
+    Width and height are read straight from the IHDR chunk at offsets 16-24.
+    """
     try:
-        from PIL import Image
-        with Image.open(png_path) as img:
-            return img.size
-    except ImportError:
-        # Read PNG header directly
-        import struct
         with open(png_path, 'rb') as f:
-            f.read(16)
-            w = struct.unpack('>I', f.read(4))[0]
-            h = struct.unpack('>I', f.read(4))[0]
-            return (w, h)
-    except Exception:
+            header = f.read(24)
+    except OSError:
         return (100, 20)
+    # Every backend writes PNG; anything else is a broken file
+    if len(header) < 24 or not header.startswith(_PNG_SIGNATURE):
+        return (100, 20)
+    return struct.unpack_from('>II', header, 16)
 
 
-def cleanup_temp_files(temp_files: list[str]):
-    """Remove temporary PNG files."""
-    for path in temp_files:
-        try:
-            if os.path.exists(path):
-                os.unlink(path)
-        except Exception as e:
-            warnings.warn(f"Failed to delete {path}: {e}")
+def cleanup_temp_files(temp_dir: str):
+    """Remove the temporary PNG directory with everything in it."""
+    # Paths may be reused by later temp files once deleted
+    get_image_size.cache_clear()
+    shutil.rmtree(temp_dir, ignore_errors=True)
 
 
-def svg_to_png_svglib(svg_string: str, output_path: str, scale: float = 2.0):
-    """Convert SVG to PNG using svglib + reportlab."""
+@lru_cache(maxsize=1)
+def _load_svglib():
+    """Import svglib and reportlab once (svg2rlg, renderPM)."""
     from svglib.svglib import svg2rlg
     from reportlab.graphics import renderPM
+    return svg2rlg, renderPM
+
+
+def svg_to_png_svglib(svg_string: str, output_path: str, scale: float = 2.0):
+    """Convert SVG to PNG using svglib + reportlab."""
     import io
+    svg2rlg, renderPM = _load_svglib()
     
     drawing = svg2rlg(io.StringIO(svg_string))
     
@@ -50,3 +57,32 @@ def svg_to_png_svglib(svg_string: str, output_path: str, scale: float = 2.0):
     drawing.scale(scale, scale)
     
     renderPM.drawToFile(drawing, output_path, fmt="PNG")
+
+
+@lru_cache(maxsize=None)
+def get_svg_converter(svg_backend: str | None):
+    """Resolve the SVG -> PNG file converter for a backend once.
+    
+    Returns:
+        convert(svg_string, output_path, scale)
+    """
+    if svg_backend == 'resvg':
+        import resvg_py
+        
+        def svg_to_png_resvg(svg_string: str, output_path: str, scale: float = 2.0):
+            # Formula SVGs are glyph paths: skip loading the system font database
+            png = resvg_py.svg_to_bytes(svg_string=svg_string, zoom=scale, skip_system_fonts=True)
+            with open(output_path, "wb") as f:
+                f.write(png)
+        
+        return svg_to_png_resvg
+    
+    if svg_backend != 'cairosvg':
+        return svg_to_png_svglib
+    
+    import cairosvg
+    
+    def svg_to_png_cairosvg(svg_string: str, output_path: str, scale: float = 2.0):
+        cairosvg.svg2png(bytestring=svg_string.encode(), write_to=output_path, scale=scale)
+    
+    return svg_to_png_cairosvg
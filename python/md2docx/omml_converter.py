@@ -3,17 +3,18 @@ LaTeX to OMML (Office Math Markup Language) converter.
 Converts LaTeX formulas to native Word math format.
 """
 
+import copy
 import re
 import warnings
+from functools import lru_cache
 from lxml import etree
 
-try:
-    import latex2mathml.converter
-    import mathml2omml
-    OMML_AVAILABLE = True
-except ImportError:
-    OMML_AVAILABLE = False
 
+# \text{...}, converted to \mathrm{...}
+_TEXT_PATTERN = re.compile(r'\\text\{([^}]*)\}')
+
+# Plain command renames applied after \text{}: \dots -> \ldots, \neq -> \ne
+_LATEX_FIXUPS = ((r'\dots', r'\ldots'), (r'\neq', r'\ne'))
 
 # OMML namespace
 OMML_NS = "http://schemas.openxmlformats.org/officeDocument/2006/math"
@@ -25,11 +26,82 @@ NSMAP = {
 }
 
 
+@lru_cache(maxsize=1)
+def _load_omml():
+    """Import latex2mathml and mathml2omml on first use.
+    
+    Returns:
+        (latex2mathml.converter, mathml2omml) or None if not installed
+    """
+    try:
+        import latex2mathml.converter
+        import mathml2omml
+    except ImportError:
+        return None
+    return latex2mathml.converter, mathml2omml
+
+
+def __getattr__(name):
+    # OMML_AVAILABLE imports the converters, so resolve it on access only
+    if name == "OMML_AVAILABLE":
+        return _load_omml() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_omath_para_template() -> etree._Element:
+    """Build an empty oMathPara centered via oMathParaPr/jc."""
+    omath_para = etree.Element(f'{{{OMML_NS}}}oMathPara', nsmap=NSMAP)
+    omath_para_pr = etree.SubElement(omath_para, f'{{{OMML_NS}}}oMathParaPr')
+    jc = etree.SubElement(omath_para_pr, f'{{{OMML_NS}}}jc')
+    jc.set(f'{{{OMML_NS}}}val', 'center')
+    return omath_para
+
+
+# Copied for every block formula instead of rebuilt
+_OMATH_PARA_TEMPLATE = _build_omath_para_template()
+
+
+@lru_cache(maxsize=1024)
+def _preprocess_latex(latex: str) -> str:
+    """Preprocess LaTeX for better MathML conversion (cached, formulas repeat)."""
+    # Remove leading/trailing whitespace, convert \text{} to \mathrm{}
+    latex = latex.strip()
+    if '\\text{' in latex:
+        latex = _TEXT_PATTERN.sub(r'\\mathrm{\1}', latex)
+    for old, new in _LATEX_FIXUPS:
+        latex = latex.replace(old, new)
+    return latex
+
+
+@lru_cache(maxsize=2048)
+def _latex_to_omml_bytes(latex: str) -> bytes:
+    """Convert LaTeX to serialized OMML (cached; elements can't be shared)."""
+    l2m_converter, mathml2omml = _load_omml()
+    
+    # Preprocess LaTeX for better compatibility
+    latex = _preprocess_latex(latex)
+    
+    # Convert LaTeX to MathML
+    mathml = l2m_converter.convert(latex)
+    
+    # Convert MathML to OMML
+    import html.entities
+    omml_str = mathml2omml.convert(mathml, html.entities.name2codepoint)
+    
+    # Add namespace declaration to OMML string
+    # mathml2omml outputs with m: prefix but no xmlns declaration
+    omml_str = omml_str.replace(
+        '<m:oMath>',
+        f'<m:oMath xmlns:m="{OMML_NS}">'
+    )
+    return omml_str.encode('utf-8')
+
+
 class OmmlConverter:
     """Converts LaTeX formulas to OMML for Word documents."""
     
     def __init__(self):
-        self.enabled = OMML_AVAILABLE
+        self.enabled = _load_omml() is not None
         if not self.enabled:
             warnings.warn("latex2mathml or mathml2omml not available. Install with: pip install latex2mathml mathml2omml")
     
@@ -47,47 +119,14 @@ class OmmlConverter:
             return None
         
         try:
-            # Preprocess LaTeX for better compatibility
-            latex = self._preprocess_latex(latex)
-            
-            # Convert LaTeX to MathML
-            mathml = latex2mathml.converter.convert(latex)
-            
-            # Convert MathML to OMML
-            import html.entities
-            omml_str = mathml2omml.convert(mathml, html.entities.name2codepoint)
-            
-            # Add namespace declaration to OMML string
-            # mathml2omml outputs with m: prefix but no xmlns declaration
-            omml_str = omml_str.replace(
-                '<m:oMath>',
-                f'<m:oMath xmlns:m="{OMML_NS}">'
-            )
-            
-            # Parse OMML string to element
-            omml_elem = etree.fromstring(omml_str.encode('utf-8'))
-            
-            return omml_elem
-            
+            return etree.fromstring(_latex_to_omml_bytes(latex))
         except Exception as e:
             warnings.warn(f"Failed to convert LaTeX to OMML: {latex[:50]}... Error: {e}")
             return None
     
     def _preprocess_latex(self, latex: str) -> str:
         """Preprocess LaTeX for better MathML conversion."""
-        # Remove leading/trailing whitespace
-        latex = latex.strip()
-        
-        # Handle \text{} command - convert to \mathrm{}
-        latex = re.sub(r'\\text\{([^}]*)\}', r'\\mathrm{\1}', latex)
-        
-        # Handle \dots -> \ldots
-        latex = latex.replace(r'\dots', r'\ldots')
-        
-        # Handle \neq -> \ne
-        latex = latex.replace(r'\neq', r'\ne')
-        
-        return latex
+        return _preprocess_latex(latex)
     
     def create_inline_omath(self, latex: str) -> etree._Element | None:
         """
@@ -127,13 +166,8 @@ class OmmlConverter:
         if omml is None:
             return None
         
-        # Create oMathPara wrapper for block display
-        omath_para = etree.Element(f'{{{OMML_NS}}}oMathPara', nsmap=NSMAP)
-        
-        # Add math properties for centering
-        omath_para_pr = etree.SubElement(omath_para, f'{{{OMML_NS}}}oMathParaPr')
-        jc = etree.SubElement(omath_para_pr, f'{{{OMML_NS}}}jc')
-        jc.set(f'{{{OMML_NS}}}val', 'center')
+        # Centered oMathPara wrapper for block display
+        omath_para = copy.deepcopy(_OMATH_PARA_TEMPLATE)
         
         # Add the oMath element
         if omml.tag.endswith('oMath'):
@@ -147,4 +181,4 @@ class OmmlConverter:
 
 def is_omml_available() -> bool:
     """Check if OMML conversion is available."""
-    return OMML_AVAILABLE
+    return _load_omml() is not None
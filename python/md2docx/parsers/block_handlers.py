@@ -5,98 +5,99 @@ Block-level node handlers for markdown AST.
 from docx.shared import Pt, RGBColor
 import mistune
 
+from ..latex.patterns import BLOCK_MARKER_PREFIX, INLINE_MARKER_PREFIX, is_block_marker, iter_markers
+
+# Parser for single lines of indented text; mistune parsers can be reused
+_INLINE_MARKDOWN = mistune.create_markdown(renderer=None)
+
+# Heading run formatting, shared by every run
+_HEADING_FONT = "Times New Roman"
+_HEADING_PT = Pt(14)
+_BLACK = RGBColor(0, 0, 0)
+
+# Line breaks: trimmed at paragraph edges, split lines into paragraphs
+_BREAKS = frozenset(("softbreak", "linebreak"))
+
 
 class BlockHandlerMixin:
     """Mixin for handling block-level nodes."""
     
     def handle_heading(self, node: dict):
         """Handle heading node."""
-        level = node.get("attrs", {}).get("level", 1)
+        level = (node.get("attrs") or {}).get("level", 1)
         p = self.builder.add_heading("", level)
-        self.inline.render_children(node.get("children", []), p)
+        self.inline.render_children(node.get("children", ()), p)
         
         for run in p.runs:
-            run.font.name = "Times New Roman"
-            run.font.size = Pt(14)
-            run.bold = True
-            run.font.color.rgb = RGBColor(0, 0, 0)
+            font = run.font
+            font.name = _HEADING_FONT
+            font.size = _HEADING_PT
+            font.bold = True
+            font.color.rgb = _BLACK
     
     def handle_paragraph(self, node: dict):
         """Handle paragraph node."""
-        children = node.get("children", [])
+        children = node.get("children", ())
         
-        # Filter out empty breaks at start/end
-        while children and children[0].get("type") in ["softbreak", "linebreak"]:
-            children = children[1:]
-        while children and children[-1].get("type") in ["softbreak", "linebreak"]:
-            children = children[:-1]
+        # Filter out empty breaks at start/end (one slice, by index)
+        start, end = 0, len(children)
+        while start < end and children[start].get("type") in _BREAKS:
+            start += 1
+        while end > start and children[end - 1].get("type") in _BREAKS:
+            end -= 1
         
-        if not children:
+        if start == end:
             return
         
-        # Check if paragraph contains only block formula markers
-        if len(children) == 1 and children[0].get("type") == "text":
-            text = children[0].get("raw", "").strip()
-            if self.builder.latex.block_marker_pattern.fullmatch(text):
-                self.builder.process_block_markers(text, None)
+        # Single text child with a block marker: only the formula, or mixed with text
+        if end - start == 1 and children[start].get("type") == "text":
+            text = children[start].get("raw", "")
+            if BLOCK_MARKER_PREFIX in text:
+                stripped = text.strip()
+                if is_block_marker(stripped):
+                    self.builder.process_block_markers(stripped, None)
+                else:
+                    self._handle_mixed_block_paragraph(text)
                 return
         
-        # Check if paragraph contains block formula mixed with text
-        if len(children) == 1 and children[0].get("type") == "text":
-            text = children[0].get("raw", "")
-            if self.builder.latex.block_marker_pattern.search(text):
-                self._handle_mixed_block_paragraph(text)
-                return
-        
-        # Split by softbreak/linebreak - each line becomes a new paragraph
-        current_children = []
-        for child in children:
-            ctype = child.get("type")
-            if ctype in ["softbreak", "linebreak"]:
-                if current_children:
+        # Split by softbreak/linebreak - each line becomes a new paragraph,
+        # rendered in one call so its adjacent text merges into one run
+        line_start = start
+        for i in range(start, end + 1):
+            if i == end or children[i].get("type") in _BREAKS:
+                if i > line_start:
                     p = self.builder.add_paragraph()
-                    for c in current_children:
-                        self.inline.render_inline(c, p)
-                    current_children = []
-            else:
-                current_children.append(child)
-        
-        if current_children:
-            p = self.builder.add_paragraph()
-            for c in current_children:
-                self.inline.render_inline(c, p)
+                    self.inline.render_children(children[line_start:i], p)
+                line_start = i + 1
     
     def _handle_mixed_block_paragraph(self, text: str):
         """Handle paragraph with mixed text and block formulas."""
-        parts = []
+        formulas = self.builder.formulas
         last_end = 0
         
-        for m in self.builder.latex.block_marker_pattern.finditer(text):
-            if m.start() > last_end:
-                parts.append(("text", text[last_end:m.start()]))
-            parts.append(("block", int(m.group(1))))
-            last_end = m.end()
+        for start, end, block_id in iter_markers(text, "block"):
+            if start > last_end:
+                self._emit_mixed_text(text[last_end:start])
+            formulas.add_block(formulas.latex_blocks.get(block_id, ""))
+            last_end = end
         
         if last_end < len(text):
-            parts.append(("text", text[last_end:]))
-        
-        for ptype, content in parts:
-            if ptype == "text":
-                content = content.strip()
-                if content:
-                    p = self.builder.add_paragraph()
-                    if self.builder.latex.inline_marker_pattern.search(content):
-                        self.builder.process_inline_markers(content, p)
-                    else:
-                        self.builder.add_text_run(p, content)
-            elif ptype == "block":
-                formula = self.builder.formulas.latex_blocks.get(content, "")
-                self.builder.formulas.add_block(formula)
+            self._emit_mixed_text(text[last_end:])
+    
+    def _emit_mixed_text(self, content: str):
+        """Add text between block formulas as its own paragraph, if not blank."""
+        content = content.strip()
+        if content:
+            p = self.builder.add_paragraph()
+            if INLINE_MARKER_PREFIX in content:
+                self.builder.process_inline_markers(content, p)
+            else:
+                self.builder.add_text_run(p, content)
     
     def handle_code_block(self, node: dict):
         """Handle code block node."""
         code = node.get("raw", "")
-        lang = node.get("attrs", {}).get("info", "")
+        lang = (node.get("attrs") or {}).get("info", "")
         style = node.get("style", "")
         
         # Indented text without language is often just continuation text
@@ -106,9 +107,9 @@ class BlockHandlerMixin:
                 line = line.strip()
                 if line:
                     p = self.builder.add_paragraph()
-                    if self.builder.latex.block_marker_pattern.search(line):
+                    if BLOCK_MARKER_PREFIX in line:
                         self.builder.process_block_markers(line, p)
-                    elif self.builder.latex.inline_marker_pattern.search(line):
+                    elif INLINE_MARKER_PREFIX in line:
                         self._parse_and_render_inline_text(line, p)
                     else:
                         self._parse_and_render_inline_text(line, p)
@@ -117,18 +118,17 @@ class BlockHandlerMixin:
     
     def _parse_and_render_inline_text(self, text: str, paragraph):
         """Parse text for inline markdown (bold, italic) and render."""
-        md = mistune.create_markdown(renderer=None)
-        ast = md(text)
+        ast = _INLINE_MARKDOWN(text)
         if ast and ast[0].get("type") == "paragraph":
-            self.inline.render_children(ast[0].get("children", []), paragraph)
+            self.inline.render_children(ast[0].get("children", ()), paragraph)
         else:
             self.builder.add_text_run(paragraph, text)
     
     def handle_blockquote(self, node: dict):
         """Handle blockquote node."""
-        for child in node.get("children", []):
+        for child in node.get("children", ()):
             p = self.builder.add_blockquote()
             if child.get("type") == "paragraph":
-                self.inline.render_children(child.get("children", []), p)
+                self.inline.render_children(child.get("children", ()), p)
             else:
                 self.inline.render_children([child], p)
@@ -5,173 +5,165 @@ Inline element rendering for markdown AST.
 import re
 from docx.shared import Pt
 
+from ..latex.patterns import MARKER_PREFIX, BLOCK_MARKER_PREFIX, INLINE_MARKER_PREFIX, INLINE_PATTERN
+
+# Code span font, shared by every span
+_CODE_FONT = "Courier New"
+_CODE_PT = Pt(12)
+
+# Formatting containers: (turns bold on, turns italic on) for their children
+_CONTAINERS = {"strong": (True, False), "emphasis": (False, True)}
+
+# Inline HTML rendered as a line break (compared lowercased and stripped)
+_BR_TAGS = frozenset(("<br>", "<br/>", "<br />"))
+
 
 class InlineRenderer:
     """Renders inline markdown elements to DOCX."""
     
+    __slots__ = ("builder", "_dispatch")
+    
     # Pattern to match **bold** text that wasn't parsed by mistune
     UNPARSED_BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
     
     def __init__(self, builder):
         self.builder = builder
+        # Node type -> handler(node, paragraph, bold, italic, max_width)
+        self._dispatch = {
+            "text": self._render_text,
+            "codespan": self._render_codespan,
+            "link": self._render_link,
+            "softbreak": self._render_break,
+            "linebreak": self._render_break,
+            "inline_html": self._render_inline_html,
+        }
     
-    def render_children(self, children: list, paragraph):
-        """Render list of child nodes."""
-        for child in children:
-            self.render_inline(child, paragraph)
+    def render_children(self, children: list, paragraph, max_width: float = None,
+                        bold: bool = False, italic: bool = False):
+        """Render list of child nodes.
+        
+        Strong/emphasis containers are flattened with an explicit stack, so
+        every leaf is dispatched from this one loop with its formatting.
+        Adjacent plain text leaves with the same formatting become one run.
+        
+        Args:
+            max_width: Maximum formula width in points; set for table cells
+        """
+        dispatch = self._dispatch
+        add_text_run = self.builder.add_text_run
+        # Text with this still needs parsing: raw $...$ in cells, unparsed ** elsewhere
+        special = '$' if max_width is not None else '**'
+        pending = []  # Plain text not yet emitted, all formatted as pending_fmt
+        pending_fmt = (bold, italic)
+        stack = [(child, bold, italic) for child in reversed(children)]
+        while stack:
+            node, b, i = stack.pop()
+            ntype = node.get("type")
+            fmt = _CONTAINERS.get(ntype)
+            if fmt is not None:
+                b = b or fmt[0]
+                i = i or fmt[1]
+                stack.extend((c, b, i) for c in reversed(node.get("children", ())))
+                continue
+            handler = dispatch.get(ntype)
+            if not handler:
+                continue
+            if ntype == "text":
+                raw = node.get("raw", "")
+                if MARKER_PREFIX not in raw and special not in raw:
+                    if pending and pending_fmt != (b, i):
+                        add_text_run(paragraph, "".join(pending), bold=pending_fmt[0], italic=pending_fmt[1])
+                        pending.clear()
+                    pending.append(raw)
+                    pending_fmt = (b, i)
+                    continue
+            if pending:
+                add_text_run(paragraph, "".join(pending), bold=pending_fmt[0], italic=pending_fmt[1])
+                pending.clear()
+            handler(node, paragraph, b, i, max_width)
+        if pending:
+            add_text_run(paragraph, "".join(pending), bold=pending_fmt[0], italic=pending_fmt[1])
     
     def _render_text_with_unparsed_bold(self, text: str, paragraph, bold: bool, italic: bool):
         """Render text that may contain unparsed **bold** markers."""
-        last_end = 0
-        
-        for match in self.UNPARSED_BOLD_PATTERN.finditer(text):
-            # Add text before bold
-            if match.start() > last_end:
-                before_text = text[last_end:match.start()]
-                if self.builder.latex.inline_marker_pattern.search(before_text):
-                    self.builder.formulas.process_inline_markers(before_text, paragraph, self.builder.add_text_run, bold=bold, italic=italic)
-                else:
-                    self.builder.add_text_run(paragraph, before_text, bold=bold, italic=italic)
-            
-            # Add bold text
-            bold_content = match.group(1)
-            if self.builder.latex.inline_marker_pattern.search(bold_content):
-                self.builder.formulas.process_inline_markers(bold_content, paragraph, self.builder.add_text_run, bold=True, italic=italic)
-            else:
-                self.builder.add_text_run(paragraph, bold_content, bold=True, italic=italic)
-            
-            last_end = match.end()
-        
-        # Add remaining text
-        if last_end < len(text):
-            remaining = text[last_end:]
-            if self.builder.latex.inline_marker_pattern.search(remaining):
-                self.builder.formulas.process_inline_markers(remaining, paragraph, self.builder.add_text_run, bold=bold, italic=italic)
+        # split() with the capture group alternates: text, bold content, text, ...
+        for i, part in enumerate(self.UNPARSED_BOLD_PATTERN.split(text)):
+            if not part:
+                continue
+            part_bold = bold or i % 2 == 1
+            if INLINE_MARKER_PREFIX in part:
+                self.builder.formulas.process_inline_markers(part, paragraph, self.builder.add_text_run, bold=part_bold, italic=italic)
             else:
-                self.builder.add_text_run(paragraph, remaining, bold=bold, italic=italic)
+                self.builder.add_text_run(paragraph, part, bold=part_bold, italic=italic)
     
-    def render_inline(self, node: dict, paragraph, bold: bool = False, italic: bool = False):
-        """Render inline node."""
-        ntype = node.get("type")
-        
-        if ntype == "text":
-            text = node.get("raw", "")
-            
-            if self.builder.latex.block_marker_pattern.search(text):
-                self.builder.process_block_markers(text, paragraph)
-            elif '**' in text and self.UNPARSED_BOLD_PATTERN.search(text):
-                # Handle unparsed **bold** with markers inside
-                self._render_text_with_unparsed_bold(text, paragraph, bold, italic)
-            elif self.builder.latex.inline_marker_pattern.search(text):
-                self.builder.formulas.process_inline_markers(text, paragraph, self.builder.add_text_run, bold=bold, italic=italic)
-            else:
-                self.builder.add_text_run(paragraph, text, bold=bold, italic=italic)
-        
-        elif ntype == "strong":
-            for c in node.get("children", []):
-                self.render_inline(c, paragraph, bold=True, italic=italic)
-        
-        elif ntype == "emphasis":
-            for c in node.get("children", []):
-                self.render_inline(c, paragraph, bold=bold, italic=True)
-        
-        elif ntype == "codespan":
-            run = paragraph.add_run(node.get("raw", ""))
-            run.font.name = "Courier New"
-            run.font.size = Pt(12)
-        
-        elif ntype == "link":
-            text = "".join(
-                c.get("raw", "") for c in node.get("children", []) 
-                if c.get("type") == "text"
-            )
-            url = node.get("attrs", {}).get("url", "")
-            run = paragraph.add_run(f"{text} ({url})")
-            run.bold = bold
-            run.italic = italic
-        
-        elif ntype in ["softbreak", "linebreak"]:
-            paragraph.add_run("\n")
-        
-        elif ntype == "inline_html":
-            # Handle HTML tags like <br>, <br/>, <br />
-            raw = node.get("raw", "").strip().lower()
-            if raw in ["<br>", "<br/>", "<br />"]:
-                paragraph.add_run("\n")
+    def render_inline(self, node: dict, paragraph, bold: bool = False, italic: bool = False,
+                      max_width: float = None):
+        """Render inline node; max_width is set for table cells."""
+        self.render_children((node,), paragraph, max_width, bold, italic)
     
-    def render_children_in_cell(self, children: list, paragraph, max_width: float):
-        """Render children in a table cell with width constraint."""
-        for child in children:
-            self.render_inline_in_cell(child, paragraph, max_width)
+    def _render_text(self, node: dict, paragraph, bold: bool, italic: bool, max_width: float):
+        """Render text node, handling formula markers.
+        
+        Body text also handles unparsed **bold**; table cells also handle
+        raw $...$ formulas (not extracted in table cells).
+        """
+        text = node.get("raw", "")
+        in_cell = max_width is not None
+        
+        # Plain text never gets here: render_children emits it directly
+        if BLOCK_MARKER_PREFIX in text:
+            self.builder.process_block_markers(text, paragraph)
+        elif not in_cell and '**' in text and self.UNPARSED_BOLD_PATTERN.search(text):
+            # Handle unparsed **bold** with markers inside
+            self._render_text_with_unparsed_bold(text, paragraph, bold, italic)
+        elif INLINE_MARKER_PREFIX in text:
+            self.builder.formulas.process_inline_markers(text, paragraph, self.builder.add_text_run, bold=bold, italic=italic, max_width=max_width)
+        elif in_cell and INLINE_PATTERN.search(text):
+            self._render_text_with_inline_formulas(text, paragraph, bold, italic, max_width)
+        else:
+            self.builder.add_text_run(paragraph, text, bold=bold, italic=italic)
     
-    def render_inline_in_cell(self, node: dict, paragraph, max_width: float, 
-                               bold: bool = False, italic: bool = False):
-        """Render inline node in a table cell with width constraint."""
-        ntype = node.get("type")
-        
-        if ntype == "text":
-            text = node.get("raw", "")
-            
-            # Check for markers first (from pre-extracted formulas)
-            if self.builder.latex.block_marker_pattern.search(text):
-                self.builder.process_block_markers(text, paragraph)
-            elif self.builder.latex.inline_marker_pattern.search(text):
-                self.builder.formulas.process_inline_markers(text, paragraph, self.builder.add_text_run, bold=bold, italic=italic, max_width=max_width)
-            # Check for raw $...$ formulas (not extracted in table cells)
-            elif self.builder.latex.inline_pattern.search(text):
-                self._render_text_with_inline_formulas(text, paragraph, bold, italic, max_width)
-            else:
-                self.builder.add_text_run(paragraph, text, bold=bold, italic=italic)
-        
-        elif ntype == "strong":
-            for c in node.get("children", []):
-                self.render_inline_in_cell(c, paragraph, max_width, bold=True, italic=italic)
-        
-        elif ntype == "emphasis":
-            for c in node.get("children", []):
-                self.render_inline_in_cell(c, paragraph, max_width, bold=bold, italic=True)
-        
-        elif ntype == "codespan":
-            run = paragraph.add_run(node.get("raw", ""))
-            run.font.name = "Courier New"
-            run.font.size = Pt(12)
-        
-        elif ntype == "link":
-            text = "".join(
-                c.get("raw", "") for c in node.get("children", []) 
-                if c.get("type") == "text"
-            )
-            url = node.get("attrs", {}).get("url", "")
-            run = paragraph.add_run(f"{text} ({url})")
-            run.bold = bold
-            run.italic = italic
-        
-        elif ntype in ["softbreak", "linebreak"]:
+    def _render_codespan(self, node: dict, paragraph, bold: bool, italic: bool, max_width: float):
+        run = paragraph.add_run(node.get("raw", ""))
+        font = run.font
+        font.name = _CODE_FONT
+        font.size = _CODE_PT
+    
+    def _render_break(self, node: dict, paragraph, bold: bool, italic: bool, max_width: float):
+        paragraph.add_run("\n")
+    
+    def _render_inline_html(self, node: dict, paragraph, bold: bool, italic: bool, max_width: float):
+        # Handle HTML tags like <br>, <br/>, <br />
+        raw = node.get("raw", "").strip().lower()
+        if raw in _BR_TAGS:
             paragraph.add_run("\n")
-        
-        elif ntype == "inline_html":
-            # Handle HTML tags like <br>, <br/>, <br />
-            raw = node.get("raw", "").strip().lower()
-            if raw in ["<br>", "<br/>", "<br />"]:
-                paragraph.add_run("\n")
+    
+    def _render_link(self, node: dict, paragraph, bold: bool, italic: bool, max_width: float):
+        """Render link as a single "text (url)" run."""
+        # Collect text in order, including text nested in strong/emphasis
+        parts = []
+        stack = list(reversed(node.get("children", ())))
+        while stack:
+            child = stack.pop()
+            if child.get("type") == "text":
+                parts.append(child.get("raw", ""))
+            else:
+                stack.extend(reversed(child.get("children", ())))
+        
+        url = (node.get("attrs") or {}).get("url", "")
+        url_suffix = f" ({url})" if url else ""
+        run = paragraph.add_run("".join(parts) + url_suffix)
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
     
     def _render_text_with_inline_formulas(self, text: str, paragraph, 
                                            bold: bool, italic: bool, max_width: float):
         """Render text containing raw $...$ inline formulas."""
-        pattern = self.builder.latex.inline_pattern
-        last_end = 0
-        
-        for match in pattern.finditer(text):
-            # Add text before formula
-            if match.start() > last_end:
-                before_text = text[last_end:match.start()]
-                self.builder.add_text_run(paragraph, before_text, bold=bold, italic=italic)
-            
-            # Render formula
-            formula = match.group(1)
-            self.builder.formulas.add_inline(paragraph, formula, self.builder.add_text_run, max_width=max_width)
-            last_end = match.end()
-        
-        # Add remaining text
-        if last_end < len(text):
-            self.builder.add_text_run(paragraph, text[last_end:], bold=bold, italic=italic)
+        # split() with the capture group alternates: text, formula, text, ...
+        for i, part in enumerate(INLINE_PATTERN.split(text)):
+            if i % 2 == 1:
+                self.builder.formulas.add_inline(paragraph, part, self.builder.add_text_run, max_width=max_width)
+            elif part:
+                self.builder.add_text_run(paragraph, part, bold=bold, italic=italic)
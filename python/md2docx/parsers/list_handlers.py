@@ -4,57 +4,73 @@ List node handlers for markdown AST.
 
 import re
 
+from ..latex.patterns import MARKER_PREFIX
+
+# Any formula marker, dropped when measuring line length
+_ANY_MARKER_PATTERN = re.compile(r'⟦LATEX_(?:INLINE|BLOCK):\d+⟧')
+
+# Item children rendered line by line, and the breaks that split the lines
+_TEXT_BLOCKS = frozenset(("paragraph", "block_text"))
+_BREAKS = frozenset(("softbreak", "linebreak"))
+
 
 class ListHandlerMixin:
     """Mixin for handling list nodes."""
     
     def handle_list(self, node: dict, prev_list_type: str) -> str:
         """Handle list node. Returns current list type."""
-        ordered = node.get("attrs", {}).get("ordered", False)
-        list_type = "List Number" if ordered else "List Bullet"
+        ordered = (node.get("attrs") or {}).get("ordered", False)
         current_type = "ordered" if ordered else "bullet"
         
-        children = node.get("children", [])
+        children = node.get("children", ())
         
         for idx, item in enumerate(children):
             restart = (idx == 0 and ordered and prev_list_type != current_type)
-            self.handle_list_item(item, list_type, restart)
+            self.handle_list_item(item, ordered, restart)
         
         return current_type
     
-    def handle_list_item(self, node: dict, list_type: str, is_first: bool = False, level: int = 0):
+    def handle_list_item(self, node: dict, ordered: bool, is_first: bool = False, level: int = 0):
         """Handle list item node.
         
         Creates multiple paragraphs for list items with multiple lines:
         - First line (header): LEFT alignment
         - Continuation lines: JUSTIFY for long text, LEFT for short/formulas
         """
-        ordered = list_type == "List Number"
+        # Nested lists use an explicit stack instead of recursion:
+        # (children iterator, ordered, is_first, level) per item being rendered
+        stack = [(iter(node.get("children", ())), ordered, is_first, level)]
         
-        for child in node.get("children", []):
+        while stack:
+            children_iter, ordered, is_first, level = stack[-1]
+            child = next(children_iter, None)
+            if child is None:
+                stack.pop()
+                continue
+            
             ctype = child.get("type")
-            if ctype in ["paragraph", "block_text"]:
+            if ctype in _TEXT_BLOCKS:
                 # Get children and split by softbreak/linebreak
-                children = child.get("children", [])
+                children = child.get("children", ())
                 lines = self._split_by_breaks(children)
                 
-                for line_idx, line_children in enumerate(lines):
+                for line_idx, (line_children, justify) in enumerate(lines):
                     if line_idx == 0:
                         # First line - create list item with bullet/number
                         p = self.builder.add_list_item(ordered=ordered, restart=(is_first and ordered), level=level)
                     else:
-                        # Continuation lines - determine alignment
-                        justify = self._should_justify_line(line_children)
+                        # Continuation lines - alignment by text length
                         p = self.builder.add_list_continuation(justify=justify)
                     
                     self.inline.render_children(line_children, p)
                     
             elif ctype == "list":
-                # Handle nested list
-                nested_ordered = child.get("attrs", {}).get("ordered", False)
-                nested_list_type = "List Number" if nested_ordered else "List Bullet"
-                for idx, nested_item in enumerate(child.get("children", [])):
-                    self.handle_list_item(nested_item, nested_list_type, is_first=(idx == 0), level=level + 1)
+                # Handle nested list: its items go on top, first item on top,
+                # and this item's remaining children resume after them
+                nested_ordered = (child.get("attrs") or {}).get("ordered", False)
+                nested_items = child.get("children", ())
+                for idx in range(len(nested_items) - 1, -1, -1):
+                    stack.append((iter(nested_items[idx].get("children", ())), nested_ordered, idx == 0, level + 1))
             elif ctype == "table":
                 # Handle table inside list item
                 self.handle_table(child)
@@ -64,62 +80,71 @@ class ListHandlerMixin:
                 self.inline.render_children([child], p)
     
     def _split_by_breaks(self, children: list) -> list:
-        """Split children list by softbreak/linebreak nodes into separate lines."""
+        """Split children list by softbreak/linebreak nodes into separate lines.
+        
+        Each line's text length and formula count are gathered in the same
+        pass, for its JUSTIFY decision.
+        
+        Returns:
+            [(line children, justify), ...]
+        """
         lines = []
         current_line = []
+        text_len = formula_count = 0
         
         for child in children:
             ctype = child.get("type")
-            if ctype in ["softbreak", "linebreak"]:
+            if ctype in _BREAKS:
                 if current_line:
-                    lines.append(current_line)
+                    lines.append((current_line, _should_justify(text_len, formula_count)))
                     current_line = []
-            else:
-                current_line.append(child)
-        
-        if current_line:
-            lines.append(current_line)
-        
-        return lines if lines else [[]]
-    
-    def _should_justify_line(self, children: list) -> bool:
-        """Determine if line should use JUSTIFY alignment.
-        
-        Returns False (LEFT) for:
-        - Short lines (< 50 chars of actual text)
-        - Lines that are mostly formulas
-        
-        Returns True (JUSTIFY) for long text lines.
-        """
-        if not children:
-            return False
-        
-        # Estimate actual text length (excluding formula markers)
-        text_len = 0
-        formula_count = 0
-        
-        for child in children:
-            ctype = child.get("type")
+                    text_len = formula_count = 0
+                continue
+            
+            current_line.append(child)
+            # Estimate actual text length (excluding formula markers)
             if ctype == "text":
-                raw = child.get("raw", "")
-                formula_count += raw.count("⟦LATEX_INLINE:")
-                formula_count += raw.count("⟦LATEX_BLOCK:")
-                clean_text = re.sub(r'⟦LATEX_(?:INLINE|BLOCK):\d+⟧', '', raw)
-                text_len += len(clean_text)
+                n, f = _text_metrics(child.get("raw", ""), count_blocks=True)
+                text_len += n
+                formula_count += f
             elif ctype == "strong":
-                for c in child.get("children", []):
+                for c in child.get("children", ()):
                     if c.get("type") == "text":
-                        raw = c.get("raw", "")
-                        formula_count += raw.count("⟦LATEX_INLINE:")
-                        clean_text = re.sub(r'⟦LATEX_(?:INLINE|BLOCK):\d+⟧', '', raw)
-                        text_len += len(clean_text)
+                        n, f = _text_metrics(c.get("raw", ""), count_blocks=False)
+                        text_len += n
+                        formula_count += f
         
-        # Short lines -> LEFT
-        if text_len < 50:
-            return False
-        
-        # Lines with many formulas and little text -> LEFT
-        if formula_count >= 2 and text_len < 40:
-            return False
+        if current_line:
+            lines.append((current_line, _should_justify(text_len, formula_count)))
         
-        return True
+        return lines if lines else [([], False)]
+
+
+def _text_metrics(raw: str, count_blocks: bool) -> tuple[int, int]:
+    """Text length without formula markers, and the number of formulas."""
+    if MARKER_PREFIX not in raw:
+        return len(raw), 0
+    formula_count = raw.count("⟦LATEX_INLINE:")
+    if count_blocks:
+        formula_count += raw.count("⟦LATEX_BLOCK:")
+    return len(_ANY_MARKER_PATTERN.sub('', raw)), formula_count
+
+
+def _should_justify(text_len: int, formula_count: int) -> bool:
+    """Determine if a line should use JUSTIFY alignment.
+    
+    Returns False (LEFT) for:
+    - Short lines (< 50 chars of actual text)
+    - Lines that are mostly formulas
+    
+    Returns True (JUSTIFY) for long text lines.
+    """
+    # Short lines -> LEFT
+    if text_len < 50:
+        return False
+    
+    # Lines with many formulas and little text -> LEFT
+    if formula_count >= 2 and text_len < 40:
+        return False
+    
+    return True
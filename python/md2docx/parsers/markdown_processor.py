@@ -2,7 +2,7 @@
 Main markdown processor - facade for the parsing subsystem.
 """
 
-from ..document_builder import DocumentBuilder
+from ..builders import DocumentBuilder
 from .ast_processor import ASTProcessor
 
 
@@ -5,67 +5,117 @@ Text preprocessing before markdown parsing.
 import re
 
 
+# 4+ space indented bullet item (mistune would read it as code), at any line start;
+# the whitespace after the marker stays on its line
+_NESTED_LIST_ITEM = re.compile(r'^(    +)([*\-])[^\S\n]+', re.MULTILINE)
+
+# Garbage punctuation cleanup: (trigger, pattern, replacement), applied in order.
+# Every match contains the trigger substring, so a rule is skipped when the
+# text (as left by the rules before it) doesn't; None means always run.
+_CLEAN_RULES = [
+    # ,: -> : (comma before colon is OCR artifact, e.g. "классы,:" -> "классы:")
+    (',:', re.compile(r',:'), ':'),
+    # ,. or ,,. or ,,,. -> . (keep the period)
+    (',.', re.compile(r',+\.'), '.'),
+    # ?. or ?.. -> ? (question mark is already sentence-ending)
+    ('?.', re.compile(r'\?\.+'), '?'),
+    # ?, or ?,. -> ? (comma/period after question mark is garbage)
+    ('?', re.compile(r'\?[,.]+'), '?'),
+    # !. or !.. -> !
+    ('!.', re.compile(r'!\.+'), '!'),
+    # !, -> ! (comma after exclamation is garbage)
+    ('!,', re.compile(r'!,+'), '!'),
+    # ,, at end of sentence (before newline or end of text) -> . (likely OCR artifact)
+    (',,', re.compile(r',,(\s*\n)'), r'.\1'),
+    (',,', re.compile(r',,$'), '.'),
+    # Single trailing comma at end of sentence (before newline) -> . (likely OCR artifact)
+    (',', re.compile(r',(\s*\n)'), r'.\1'),
+    # Remove repeated commas in middle of text (,, -> ,) - only if not at sentence end
+    (',,', re.compile(r',{2,}(?!\s*(?:\n|$))'), ','),
+    # Remove repeated periods (..) but keep ... (ellipsis)
+    ('..', re.compile(r'\.{2}(?!\.)'), '.'),
+    # Clean up spaces before punctuation
+    (None, re.compile(r'\s+([,.])'), r'\1'),
+]
+
+# Anything at least one cleanup rule matches; text without it is already clean
+_NEEDS_CLEAN = re.compile(r',[,.:]|[?!][,.]|\.\.|,\s*\n|\s[,.]')
+
+# ($...$) and [$...$] with optional trailing punctuation
+_PAREN_FORMULA = re.compile(r'\(\$([^$]+)\$\)([:;,.]?)')
+_BRACKET_FORMULA = re.compile(r'\[\$([^$]+)\$\]([:;,.]?)')
+
+
+def _fix_nested_item(m: re.Match) -> str:
+    """Convert 4-space indent blocks of a list item to 2-space ones."""
+    return '  ' * (len(m.group(1)) // 4) + m.group(2) + ' '
+
+
 class TextPreprocessor:
     """Preprocesses markdown text before parsing."""
     
-    def fix_broken_table_lines(self, text: str) -> str:
-        """Fix table lines that were broken by text wrapping.
+    def fix_table_lines(self, text: str) -> str:
+        """Fix table lines that were broken by wrapping or indented.
         
-        Some editors wrap long lines, breaking markdown tables.
-        This joins lines that appear to be continuations of table rows.
+        Some editors wrap long lines, breaking markdown tables: lines that
+        continue a table row are joined back onto it. Tables inside list
+        items have indentation which prevents mistune from recognizing them
+        as tables: leading whitespace is removed from table rows.
+        Both are done in one pass over the lines.
         """
-        lines = text.split('\n')
-        fixed_lines = []
-        i = 0
-        
-        while i < len(lines):
-            line = lines[i]
-            
-            # Check if this looks like a table row (starts with |)
-            if line.strip().startswith('|'):
-                # A complete table row should end with |
-                # Keep joining lines until we get a complete row
-                while not line.rstrip().endswith('|') and i + 1 < len(lines):
-                    next_line = lines[i + 1]
-                    # If next line starts with |, it's a new row, stop joining
-                    if next_line.strip().startswith('|'):
-                        break
-                    # If next line is empty, stop joining
-                    if not next_line.strip():
-                        break
-                    # Join the continuation
-                    line = line.rstrip() + next_line.lstrip()
-                    i += 1
-            
-            fixed_lines.append(line)
-            i += 1
-        
-        return '\n'.join(fixed_lines)
-    
-    def fix_indented_tables(self, text: str) -> str:
-        """Remove leading indentation from table rows.
+        if '|' not in text:
+            return text
         
-        Tables inside list items have indentation which prevents
-        mistune from recognizing them as tables.
-        """
         lines = text.split('\n')
+        n = len(lines)
         result = []
         in_table = False
+        i = 0
         
-        for line in lines:
-            stripped = line.strip()
+        while i < n:
+            line = lines[i]
+            # Lines not starting with | are not table rows and end a table
+            # (most lines have no | at all: no stripped copy needed for them)
+            stripped = line.strip() if '|' in line else ''
+            if not stripped.startswith('|'):
+                in_table = False
+                result.append(line)
+                i += 1
+                continue
+            
+            # A complete table row should end with |
+            # Keep joining lines until we get a complete row
+            # (each line is stripped once; ends_pipe is for the last one joined)
+            ends_pipe = stripped.endswith('|')
+            parts = []
+            tail = line
+            while not ends_pipe and i + 1 < n:
+                next_line = lines[i + 1]
+                next_stripped = next_line.strip()
+                # If next line starts with |, it's a new row, stop joining
+                # If next line is empty, stop joining
+                if not next_stripped or next_stripped.startswith('|'):
+                    break
+                # Join the continuation (collected, joined once per row)
+                parts.append(tail.rstrip())
+                tail = next_line.lstrip()
+                ends_pipe = next_stripped.endswith('|')
+                i += 1
+            if parts:
+                parts.append(tail)
+                line = ''.join(parts)
+                stripped = line.strip()
             
-            # Check if this is a table row (starts and ends with |)
-            if stripped.startswith('|') and stripped.endswith('|'):
+            if ends_pipe:
+                # Table row: remove leading whitespace
                 in_table = True
-                # Remove leading whitespace from table rows
                 result.append(stripped)
-            elif in_table and stripped.startswith('|'):
+            elif in_table:
                 # Continuation of table (might not end with | if broken)
                 result.append(stripped)
             else:
-                in_table = False
                 result.append(line)
+            i += 1
         
         return '\n'.join(result)
     
@@ -75,53 +125,19 @@ class TextPreprocessor:
         Mistune treats 4-space indented lines as code blocks.
         Nested list items should use 2-space indentation.
         """
-        lines = text.split('\n')
-        result = []
-        
-        for line in lines:
-            # Check if line starts with 4 spaces followed by list marker (* or -)
-            # and convert to 2-space indentation
-            match = re.match(r'^(    +)([*\-])\s+', line)
-            if match:
-                spaces = match.group(1)
-                marker = match.group(2)
-                rest = line[match.end():]
-                # Convert 4-space blocks to 2-space
-                new_indent = '  ' * (len(spaces) // 4)
-                result.append(f'{new_indent}{marker} {rest}')
-            else:
-                result.append(line)
-        
-        return '\n'.join(result)
+        # One substitution over the whole text instead of a per-line loop
+        return _NESTED_LIST_ITEM.sub(_fix_nested_item, text)
     
     def clean_text(self, text: str) -> str:
         """Clean up garbage characters and formatting artifacts.
         
         Removes things like repeated punctuation (,,.), trailing commas, etc.
         """
-        # ,: -> : (comma before colon is OCR artifact, e.g. "классы,:" -> "классы:")
-        text = re.sub(r',:', ':', text)
-        # ,. or ,,. or ,,,. -> . (keep the period)
-        text = re.sub(r',+\.', '.', text)
-        # ?. or ?.. -> ? (question mark is already sentence-ending)
-        text = re.sub(r'\?\.+', '?', text)
-        # ?, or ?,. -> ? (comma/period after question mark is garbage)
-        text = re.sub(r'\?[,.]+', '?', text)
-        # !. or !.. -> !
-        text = re.sub(r'!\.+', '!', text)
-        # !, -> ! (comma after exclamation is garbage)
-        text = re.sub(r'!,+', '!', text)
-        # ,, at end of sentence (before newline or end of text) -> . (likely OCR artifact)
-        text = re.sub(r',,(\s*\n)', r'.\1', text)
-        text = re.sub(r',,$', '.', text)
-        # Single trailing comma at end of sentence (before newline) -> . (likely OCR artifact)
-        text = re.sub(r',(\s*\n)', r'.\1', text)
-        # Remove repeated commas in middle of text (,, -> ,) - only if not at sentence end
-        text = re.sub(r',{2,}(?!\s*[\n$])', ',', text)
-        # Remove repeated periods (..) but keep ... (ellipsis)
-        text = re.sub(r'\.{2}(?!\.)', '.', text)
-        # Clean up spaces before punctuation
-        text = re.sub(r'\s+([,.])', r'\1', text)
+        if not _NEEDS_CLEAN.search(text):
+            return text
+        for trigger, pattern, repl in _CLEAN_RULES:
+            if trigger is None or trigger in text:
+                text = pattern.sub(repl, text)
         return text
     
     def merge_brackets_with_formulas(self, text: str) -> str:
@@ -130,16 +146,20 @@ class TextPreprocessor:
         Converts ($formula$) to $(formula)$ so brackets render as part of formula.
         This prevents Word from breaking lines between bracket and formula.
         """
+        if '$' not in text:
+            return text
+        # Each pass only runs if its opening "($" / "[$" is present
         # ($...$): -> $(...)$: - include trailing colon
-        text = re.sub(r'\(\$([^$]+)\$\)([:;,.]?)', r'$(\1)\2$', text)
-        # [$...$] -> $[...]$
-        text = re.sub(r'\[\$([^$]+)\$\]([:;,.]?)', r'$[\1]\2$', text)
+        if '($' in text:
+            text = _PAREN_FORMULA.sub(r'$(\1)\2$', text)
+        # [$...$] -> $[...]$ (also when the pass above just produced it)
+        if '[$' in text:
+            text = _BRACKET_FORMULA.sub(r'$[\1]\2$', text)
         return text
     
     def preprocess(self, text: str) -> str:
         """Apply all preprocessing steps."""
-        text = self.fix_broken_table_lines(text)
-        text = self.fix_indented_tables(text)
+        text = self.fix_table_lines(text)
         text = self.fix_nested_list_indentation(text)
         text = self.merge_brackets_with_formulas(text)
         text = self.clean_text(text)
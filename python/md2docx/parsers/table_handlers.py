@@ -2,8 +2,23 @@
 Table node handlers for markdown AST.
 """
 
+from functools import lru_cache
+
 from docx.shared import Cm
 
+_CM0 = Cm(0)
+
+
+@lru_cache(maxsize=32)
+def _cell_max_widths(num_cols: int) -> tuple[float, ...]:
+    """Maximum formula width per column in points (column width - 10pt padding)."""
+    # Column widths in points (1cm = 28.35pt)
+    if num_cols == 3:
+        col_widths_pt = [1.5 * 28.35, 9 * 28.35, 6 * 28.35]
+    else:
+        col_widths_pt = [16.5 / num_cols * 28.35] * num_cols
+    return tuple(w - 10 for w in col_widths_pt)
+
 
 class TableHandlerMixin:
     """Mixin for handling table nodes."""
@@ -11,49 +26,48 @@ class TableHandlerMixin:
     def handle_table(self, node: dict):
         """Handle table node."""
         head = body = None
-        for child in node.get("children", []):
-            if child.get("type") == "table_head":
+        for child in node.get("children", ()):
+            ctype = child.get("type")
+            if ctype == "table_head":
                 head = child
-            elif child.get("type") == "table_body":
+            elif ctype == "table_body":
                 body = child
         
         if not head:
             return
         
-        head_cells = head.get("children", [])
+        head_cells = head.get("children", ())
         num_cols = len(head_cells)
-        body_rows = body.get("children", []) if body else []
+        body_rows = body.get("children", ()) if body else []
         num_rows = 1 + len(body_rows)
         
         table = self.builder.add_table(num_rows, num_cols)
         
-        # Column widths in points (1cm = 28.35pt)
-        if num_cols == 3:
-            col_widths_pt = [1.5 * 28.35, 9 * 28.35, 6 * 28.35]
-        else:
-            col_widths_pt = [16.5 / num_cols * 28.35] * num_cols
+        max_widths = _cell_max_widths(num_cols)
+        # Table.rows and _Row.cells rebuild their lists on each access
+        rows = list(table.rows)
         
         # Header row
-        for col, cell_node in enumerate(head_cells):
-            cell = table.rows[0].cells[col]
-            p = cell.paragraphs[0]
-            p.paragraph_format.first_line_indent = Cm(0)
-            max_w = col_widths_pt[col] - 10 if col < len(col_widths_pt) else 150
-            children = self._merge_text_nodes(cell_node.get("children", []))
-            self.inline.render_children_in_cell(children, p, max_w)
-            for run in p.runs:
-                run.bold = True
+        self._render_row(head_cells, rows[0].cells, max_widths, bold=True)
         
         # Body rows
         for row_idx, row_node in enumerate(body_rows):
-            for col, cell_node in enumerate(row_node.get("children", [])):
-                if col < num_cols:
-                    cell = table.rows[row_idx + 1].cells[col]
-                    p = cell.paragraphs[0]
-                    p.paragraph_format.first_line_indent = Cm(0)
-                    max_w = col_widths_pt[col] - 10 if col < len(col_widths_pt) else 150
-                    children = self._merge_text_nodes(cell_node.get("children", []))
-                    self.inline.render_children_in_cell(children, p, max_w)
+            self._render_row(row_node.get("children", ()), rows[row_idx + 1].cells, max_widths)
+    
+    def _render_row(self, cell_nodes, row_cells: list, max_widths: tuple[float, ...], bold: bool = False):
+        """Render cell nodes into the first paragraph of each row cell."""
+        num_cols = len(row_cells)
+        for col, cell_node in enumerate(cell_nodes):
+            # Extra cells in a body row have no column
+            if col >= num_cols:
+                break
+            p = row_cells[col].paragraphs[0]
+            p.paragraph_format.first_line_indent = _CM0
+            children = self._merge_text_nodes(cell_node.get("children", ()))
+            self.inline.render_children(children, p, max_width=max_widths[col])
+            if bold:
+                for run in p.runs:
+                    run.bold = True
     
     def _merge_text_nodes(self, children: list) -> list:
         """Merge consecutive text nodes into one.
@@ -63,23 +77,36 @@ class TableHandlerMixin:
         if not children:
             return children
         
+        # Nothing to merge or escape (the usual single text node): keep as is
+        prev_text = False
+        for child in children:
+            is_text = child.get("type") == "text"
+            if is_text:
+                raw = child.get("raw")
+                if prev_text or not raw or raw == "\\":
+                    break
+            prev_text = is_text
+        else:
+            return children
+        
         merged = []
-        current_text = ""
+        parts = []  # Raw text of the current run of text nodes, joined once
+        merged_append = merged.append
+        parts_append = parts.append
         
         for child in children:
             if child.get("type") == "text":
-                raw = child.get("raw", "")
-                if raw == "\\":
-                    current_text += "\\\\"
-                else:
-                    current_text += raw
+                raw = child.get("raw") or ""
+                parts_append("\\\\" if raw == "\\" else raw)
             else:
+                current_text = "".join(parts)
+                parts.clear()
                 if current_text:
-                    merged.append({"type": "text", "raw": current_text})
-                    current_text = ""
-                merged.append(child)
+                    merged_append({"type": "text", "raw": current_text})
+                merged_append(child)
         
+        current_text = "".join(parts)
         if current_text:
-            merged.append({"type": "text", "raw": current_text})
+            merged_append({"type": "text", "raw": current_text})
         
         return merged
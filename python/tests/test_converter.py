@@ -0,0 +1,53 @@
+"""
+Tests for Md2DocxConverter input handling.
+"""
+
+import tempfile
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from md2docx.converter import Md2DocxConverter
+
+SAMPLE = (
+    "Система:\n"
+    "\n"
+    "$$\n"
+    "\\begin{cases} x + y = 1 \\\\ x - y = 0 \\end{cases}\n"
+    "$$\n"
+    "\n"
+    "Конец.\n"
+)
+
+
+class CrlfInputTest(unittest.TestCase):
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def _convert(self, name: str, newline: str) -> str:
+        src = self.tmp / f"{name}.md"
+        src.write_bytes(SAMPLE.replace("\n", newline).encode("utf-8"))
+        out = self.tmp / f"{name}.docx"
+        converter = Md2DocxConverter(str(src), str(out), {"noLatex": True})
+        self.assertEqual(converter._read_input(), SAMPLE)
+        with redirect_stdout(StringIO()):
+            converter.convert()
+        with zipfile.ZipFile(out) as z:
+            return z.read("word/document.xml").decode()
+    
+    def test_crlf_matches_lf(self):
+        lf = self._convert("lf", "\n")
+        self.assertIn("\\begin{cases}", lf)
+        self.assertEqual(self._convert("crlf", "\r\n"), lf)
+        self.assertEqual(self._convert("cr", "\r"), lf)
+
+
+if __name__ == "__main__":
+    unittest.main()
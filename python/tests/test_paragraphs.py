@@ -0,0 +1,37 @@
+"""
+Tests for body paragraph rendering.
+"""
+
+import unittest
+
+from md2docx.builders import DocumentBuilder
+from md2docx.parsers import MarkdownProcessor
+
+
+def _paragraphs(text: str) -> list:
+    builder = DocumentBuilder({"noLatex": True})
+    processor = MarkdownProcessor(builder)
+    processor.process(processor.parse(text))
+    return [p for p in builder.doc.paragraphs if p.text]
+
+
+class ParagraphRunsTest(unittest.TestCase):
+    
+    def test_split_text_is_one_run(self):
+        # mistune splits escapes and stray backticks into separate text nodes
+        (p,) = _paragraphs("a \\* b \\_ c`` ` d\n")
+        self.assertEqual(p.text, "a * b _ c`` ` d")
+        self.assertEqual(len(p.runs), 1)
+    
+    def test_each_line_is_one_paragraph_with_one_run(self):
+        paragraphs = _paragraphs("a \\* b\nc \\_ d\n")
+        self.assertEqual([p.text for p in paragraphs], ["a * b", "c _ d"])
+        self.assertEqual([len(p.runs) for p in paragraphs], [1, 1])
+    
+    def test_formatting_still_splits_runs(self):
+        (p,) = _paragraphs("a \\* **b** c\n")
+        self.assertEqual([(r.text, bool(r.bold)) for r in p.runs], [("a * ", False), ("b", True), (" c", False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
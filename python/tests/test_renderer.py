@@ -0,0 +1,31 @@
+"""
+Tests for LaTeXRenderer backend selection.
+"""
+
+import unittest
+import warnings
+from unittest import mock
+
+from md2docx.latex import renderer
+
+
+class MathJaxFallbackTest(unittest.TestCase):
+    
+    def test_failing_worker_falls_back_for_the_same_formula(self):
+        # ziamath installed, no matplotlib: the switch must render this formula
+        with mock.patch.object(renderer, "detect_backend", return_value=(True, False, "cairosvg")), \
+                mock.patch.object(renderer, "is_node_available", return_value=True), \
+                mock.patch.object(renderer, "MathJaxWorker"), \
+                mock.patch.object(renderer.LaTeXRenderer, "_render_ziamath", side_effect=lambda f: f"{f}.png"), \
+                warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            latex = renderer.LaTeXRenderer("mathjax")
+            latex._mathjax.to_svg.side_effect = RuntimeError("mathjax-full not installed")
+            
+            self.assertEqual(latex.render_to_png("x^2"), "x^2.png")
+            self.assertEqual(latex.backend, "ziamath")
+            self.assertEqual(latex.render_to_png("y^2"), "y^2.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
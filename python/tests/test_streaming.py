@@ -0,0 +1,67 @@
+"""
+Tests for the streaming document builder.
+"""
+
+import io
+import re
+import struct
+import tempfile
+import unittest
+import zipfile
+import zlib
+from pathlib import Path
+
+from md2docx.builders import DocumentBuilder, StreamingDocumentBuilder
+
+
+def _png() -> bytes:
+    """Smallest valid PNG: one white RGB pixel."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff"))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _build(builder: DocumentBuilder) -> bytes:
+    """Add text, pictures and a table in flushed blocks; return document.xml."""
+    for _ in range(3):
+        p = builder.add_paragraph()
+        builder.add_text_run(p, "Текст ")
+        p.add_run().add_picture(io.BytesIO(_png()))
+        p.add_run().add_picture(io.BytesIO(_png()))
+        builder.flush()
+    table = builder.add_table(2, 2)
+    table.cell(0, 0).paragraphs[0].add_run("A")
+    builder.flush()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "out.docx"
+        builder.save(str(path))
+        with zipfile.ZipFile(path) as z:
+            return z.read("word/document.xml")
+
+
+class StreamingTest(unittest.TestCase):
+    
+    def test_picture_ids_unique_across_flushes(self):
+        xml = _build(StreamingDocumentBuilder({"noLatex": True})).decode()
+        
+        pictures = re.findall(r'<wp:docPr id="(\d+)" name="Picture (\d+)"', xml)
+        self.assertEqual(len(pictures), 6)
+        ids = [pic_id for pic_id, _ in pictures]
+        self.assertEqual(len(set(ids)), len(ids))
+        for pic_id, name_id in pictures:
+            self.assertEqual(pic_id, name_id)
+    
+    def test_document_xml_matches_in_memory_builder(self):
+        streamed = _build(StreamingDocumentBuilder({"noLatex": True}))
+        self.assertEqual(streamed, _build(DocumentBuilder({"noLatex": True})))
+
+
+if __name__ == "__main__":
+    unittest.main()